@@ -0,0 +1,231 @@
+"""Throughput benchmarks for scanning, matching, planning and moving.
+
+Generates synthetic intake trees of case files (ACC134.23.pdf, HREPN...,
+HRER...) mixed with noise, then measures files per second for each stage
+on one or more filesystems and prints a JSON report that can be kept
+per release to spot regressions.
+
+Examples:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000 --root /dev/shm --root /var/tmp
+    python benchmarks/run_benchmarks.py --sizes 50000 --workers 4 --output bench-1.1.0.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import tempfile
+import argparse
+import multiprocessing
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from core.config_manager import ConfigManager, CompiledPattern
+from core.engine import OrganizerEngine, OrganizerOptions
+from core.matcher import PatternMatcher
+from utils.file_utils import FileUtils
+
+CASE_PREFIXES = ("ACC", "HREPN", "HRER")
+NOISE_NAMES = ("scan_{i:06d}.pdf", "notes {i}.txt", "IMG_{i:05d}.jpg", "ACC draft {i}.docx",
+               "HRE{i}.pdf", "Thumbs{i}.db")
+
+
+def default_patterns():
+    """The built-in pattern set, without reading any config file"""
+    config_manager = ConfigManager(os.path.join(tempfile.gettempdir(), "missing-patterns.json"))
+    return config_manager.get_compiled_patterns()
+
+
+def catalog_patterns(patterns, size):
+    """``patterns`` plus ``size`` synthetic ones, like a large imported catalog"""
+    catalog = dict(patterns)
+    for i in range(size):
+        name = f"CASE{i:03d}"
+        catalog[name] = CompiledPattern(name, {"regex": rf"{name}-(\d+)\.(\d{{2}})",
+                                               "folder_format": f"{name}/{{year}}/{{number}}"})
+    return catalog
+
+
+def add_case_files(directory, count, tag):
+    for i in range(count):
+        with open(os.path.join(directory, f"ACC{i}.23_{tag}.pdf"), 'wb'):
+            pass
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def filesystem_type(path):
+    """Filesystem type of ``path`` from /proc/mounts (Linux), else None"""
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best = ("", None)
+    for mount_point, fs_type in mounts:
+        if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) \
+                and len(mount_point) > len(best[0]):
+            best = (mount_point, fs_type)
+    return best[1]
+
+
+def generate_tree(directory, count, match_ratio=0.8, seed=0):
+    """Create ``count`` empty files, ``match_ratio`` of them named like case files"""
+    rng = random.Random(seed)
+    for i in range(count):
+        if rng.random() < match_ratio:
+            name = f"{rng.choice(CASE_PREFIXES)}{rng.randint(1, 5000)}.{rng.randint(15, 24)}_{i}.pdf"
+        else:
+            name = rng.choice(NOISE_NAMES).format(i=i)
+        with open(os.path.join(directory, name), 'wb'):
+            pass
+
+
+def stage(name, count, func):
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    return value, {
+        'stage': name,
+        'files': count,
+        'seconds': round(elapsed, 4),
+        'files_per_sec': round(count / elapsed, 1) if elapsed else None,
+        'peak_rss_kb': peak_rss_kb()
+    }
+
+
+def run_case(root, size, workers=1, keep=False, catalog_size=50):
+    """Benchmark every stage on a fresh tree of ``size`` files under ``root``.
+
+    After the move, what is left of the tree is rerun the way a daily job
+    would see it: 1% new case files among the leftovers, organized with a
+    catalog of ``catalog_size`` extra patterns, once as a plain run and
+    then incrementally (cold, building the index, and warm).
+    """
+    patterns = default_patterns()
+    directory = tempfile.mkdtemp(prefix="case-bench-", dir=root)
+    try:
+        _, generate = stage("generate", size, lambda: generate_tree(directory, size))
+
+        names, scan = stage("scan", size,
+                            lambda: [name for _, name in FileUtils.scan_files(directory)])
+
+        matcher = PatternMatcher(patterns)
+        matched, classify = stage("classify", len(names),
+                                  lambda: sum(1 for name in names if matcher.match(name)))
+        _, classify_batch = stage("classify_batch", len(names),
+                                  lambda: matcher.classify_batch(names).matched)
+        del names
+
+        engine = OrganizerEngine(OrganizerOptions(journal=False))
+        plan, planning = stage("plan", size, lambda: engine.plan_patterns(directory, patterns))
+        del plan
+
+        options = OrganizerOptions(workers=workers, journal=False)
+        result, move = stage("move", matched,
+                             lambda: OrganizerEngine(options).process_patterns(directory, patterns))
+
+        catalog = catalog_patterns(patterns, catalog_size)
+        new_files = max(1, size // 100)
+        rerun_stages = []
+        for name, incremental in (("rescan", False), ("incremental_cold", True),
+                                  ("incremental_warm", True)):
+            add_case_files(directory, new_files, name)
+            rerun_options = OrganizerOptions(journal=False, incremental=incremental)
+            files = len(os.listdir(directory))
+            _, rerun = stage(name, files, lambda: OrganizerEngine(rerun_options).process_patterns(
+                directory, catalog))
+            rerun_stages.append(rerun)
+
+        return {
+            'root': root,
+            'filesystem': filesystem_type(root),
+            'size': size,
+            'matched': matched,
+            'moved': result.moved,
+            'workers': workers,
+            'catalog_size': catalog_size,
+            'stages': [generate, scan, classify, classify_batch, planning, move] + rerun_stages
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_case_isolated(args):
+    """Run one case in a fresh process so its peak RSS is its own"""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case, args)
+
+
+def default_roots():
+    roots = [tempfile.gettempdir()]
+    if os.path.isdir("/dev/shm") and filesystem_type("/dev/shm") == "tmpfs":
+        roots.insert(0, "/dev/shm")
+    return roots
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark scan/match/plan/move throughput on synthetic case-file trees."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000],
+                        help="Number of files per tree (default: %(default)s)")
+    parser.add_argument("--root", action="append", dest="roots", metavar="DIR",
+                        help="Filesystem to benchmark on (repeatable; default: /dev/shm and the temp dir)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Move threads for the move stage (default: %(default)s)")
+    parser.add_argument("--catalog-size", type=int, default=50,
+                        help="Extra synthetic patterns for the rescan/incremental stages (default: %(default)s)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run every case in this process (peak RSS is then cumulative)")
+    parser.add_argument("--output", default=None, help="Write the JSON report to a file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cases = []
+    for root in args.roots or default_roots():
+        for size in args.sizes:
+            case_args = (root, size, max(1, args.workers), False, max(0, args.catalog_size))
+            case = run_case(*case_args) if args.in_process else run_case_isolated(case_args)
+            cases.append(case)
+            print(f"{root} ({case['filesystem']}) {size} files: " + ", ".join(
+                f"{s['stage']} {s['files_per_sec']}/s" for s in case['stages']), file=sys.stderr)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': cases
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
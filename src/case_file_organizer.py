@@ -13,10 +13,13 @@ import io
 
 from core.config_manager import ConfigManager
 from core.pattern_manager import PatternManager
-from gui.progress_window import ProgressWindow
+from core.engine import OrganizerEngine, OrganizerOptions
+from gui.progress_window import ProgressWindow, ProgressRelay, POLL_INTERVAL_MS, MAX_LOG_LINES
 from utils.logger import Logger
 from utils.file_utils import FileUtils
 
+ALL_PATTERNS = "(All patterns)"
+
 class CaseFileOrganizer:
     def __init__(self):
         self.root = tk.Tk()
@@ -34,6 +37,8 @@ class CaseFileOrganizer:
         # Initialize variables
         self.processing = False
         self.progress_window = None
+        self.engine = None
+        self.progress_relay = None
         self.processing_queue = Queue()
         
     def create_gui(self):
@@ -113,7 +118,7 @@ class CaseFileOrganizer:
             
     def update_pattern_list(self):
         patterns = self.config_manager.get_all_patterns()
-        self.pattern_combo['values'] = list(patterns.keys())
+        self.pattern_combo['values'] = list(patterns.keys()) + [ALL_PATTERNS]
         if patterns:
             self.pattern_combo.set(list(patterns.keys())[0])
             
@@ -124,7 +129,7 @@ class CaseFileOrganizer:
         
     def edit_pattern(self):
         pattern_name = self.pattern_var.get()
-        if not pattern_name:
+        if not pattern_name or pattern_name == ALL_PATTERNS:
             messagebox.showerror("Error", "Please select a pattern to edit")
             return
             
@@ -134,7 +139,7 @@ class CaseFileOrganizer:
         
     def delete_pattern(self):
         pattern_name = self.pattern_var.get()
-        if not pattern_name:
+        if not pattern_name or pattern_name == ALL_PATTERNS:
             messagebox.showerror("Error", "Please select a pattern to delete")
             return
             
@@ -156,99 +161,88 @@ class CaseFileOrganizer:
             messagebox.showerror("Error", "Please select a pattern")
             return
             
-        # Save current settings
-        self.config_manager.update_setting('create_year_folders', self.create_year_folders.get())
-        self.config_manager.update_setting('sort_by_year', self.sort_by_year.get())
-        self.config_manager.update_setting('backup_before_move', self.backup_before_move.get())
+        # Save current settings with a single write
+        with self.config_manager.batch():
+            self.config_manager.update_setting('create_year_folders', self.create_year_folders.get())
+            self.config_manager.update_setting('sort_by_year', self.sort_by_year.get())
+            self.config_manager.update_setting('backup_before_move', self.backup_before_move.get())
         
-        # Start processing in a separate thread
+        # Start processing in a separate thread; it reports back through
+        # the relay, which the Tk thread polls
         self.processing = True
+        self.progress_window = None
+        self.progress_relay = ProgressRelay()
+        self.engine = OrganizerEngine(self.get_options(), logger=self.logger,
+                                      message_callback=self.progress_relay.log)
         self.processing_thread = threading.Thread(
             target=self.process_files,
             args=(directory, pattern_name)
         )
         self.processing_thread.start()
+        self.root.after(POLL_INTERVAL_MS, self.poll_progress)
+        
+    def get_options(self):
+        """Collect the current GUI options for the organizer engine"""
+        return OrganizerOptions(
+            backup_before_move=self.backup_before_move.get(),
+            create_year_folders=self.create_year_folders.get(),
+            sort_by_year=self.sort_by_year.get(),
+            fix_spaces=self.fix_spaces.get()
+        )
         
     def process_files(self, directory, pattern_name):
         try:
-            pattern = self.config_manager.get_pattern(pattern_name)
+            if pattern_name == ALL_PATTERNS:
+                # Classify every file against all patterns in one pass
+                self.engine.process_patterns(directory, self.config_manager.get_compiled_patterns(),
+                                             progress_callback=self.update_progress)
+                return
+                
+            pattern = self.config_manager.get_compiled_pattern(pattern_name)
             if not pattern:
                 raise ValueError(f"Pattern '{pattern_name}' not found")
                 
-            # Get list of files
-            files = [f for f in os.listdir(directory) 
-                    if os.path.isfile(os.path.join(directory, f))]
-            
-            # Filter files by pattern
-            pattern_files = [f for f in files if re.match(pattern['regex'], f)]
-            
-            if not pattern_files:
-                self.log_message("No files found matching the pattern")
-                return
-                
-            # Create progress window
-            self.progress_window = ProgressWindow(self.root, len(pattern_files))
-            
-            # Process files
-            for i, filename in enumerate(pattern_files):
-                if self.progress_window.cancel_var.get():
-                    break
-                    
-                try:
-                    self.process_single_file(directory, filename, pattern)
-                    self.progress_window.update(i + 1, len(pattern_files), 
-                                             f"Processing {filename}")
-                except Exception as e:
-                    self.log_message(f"Error processing {filename}: {str(e)}")
-                    
-            if not self.progress_window.cancel_var.get():
-                self.log_message("File organization completed successfully")
+            self.engine.process_files(directory, pattern, pattern_name,
+                                      progress_callback=self.update_progress)
                 
         except Exception as e:
-            self.log_message(f"Error during file organization: {str(e)}")
+            self.engine.log_message(f"Error during file organization: {str(e)}")
         finally:
             self.processing = False
-            if self.progress_window:
-                self.progress_window.window.destroy()
+            self.progress_relay.finish()
                 
-    def process_single_file(self, directory, filename, pattern):
-        file_path = os.path.join(directory, filename)
-        
-        # Create backup if enabled
-        if self.backup_before_move.get():
-            backup_path = self.file_utils.create_backup(file_path)
-            self.log_message(f"Created backup: {backup_path}")
+    def update_progress(self, current, total, status):
+        """Progress callback; runs on the worker thread and never touches Tk"""
+        if self.progress_relay.cancel_event.is_set():
+            self.engine.cancel()
+            return
             
-        try:
-            # Extract information from filename
-            match = re.match(pattern['regex'], filename)
-            if not match:
-                raise ValueError("Filename does not match pattern")
-                
-            # Get the number and year from the match
-            number = match.group(1)
-            year = "20" + match.group(2)  # Convert 2-digit year to 4-digit
+        self.progress_relay.report(current, total, status)
+        
+    def poll_progress(self):
+        """Apply queued progress and log lines on the Tk thread"""
+        relay = self.progress_relay
+        finished = relay.finished.is_set()
+        progress, messages, dropped = relay.drain()
+        
+        if dropped:
+            self.append_log_lines([f"... {dropped} log lines not shown (see log file)"])
+        if messages:
+            self.append_log_lines(messages)
             
-            # Create target directory using the pattern's folder format
-            target_dir = pattern['folder_format'].format(
-                year=year,
-                number=number
-            )
-            target_dir = os.path.join(directory, target_dir)
+        if progress and not relay.cancel_event.is_set():
+            if self.progress_window is None:
+                # Create the progress window on the first report; the total may still be unknown
+                self.progress_window = ProgressWindow(self.root, progress[1],
+                                                      cancel_event=relay.cancel_event)
+            self.progress_window.update(*progress)
             
-            # Ensure the target directory exists
-            self.file_utils.ensure_directory(target_dir)
+        if finished:
+            if self.progress_window and not relay.cancel_event.is_set():
+                self.progress_window.window.destroy()
+            return
             
-            # Move file
-            target_path = os.path.join(target_dir, filename)
-            if self.file_utils.move_file(file_path, target_path):
-                self.log_message(f"Moved {filename} to {target_path}")
-            else:
-                raise ValueError("Failed to move file")
-                
-        except Exception as e:
-            self.log_message(f"Error processing {filename}: {str(e)}")
-            raise
+        self.root.after(POLL_INTERVAL_MS, self.poll_progress)
             
     def fix_pattern_spaces(self, filename, pattern):
         """Fix spaces in filename according to pattern"""
@@ -280,7 +274,14 @@ class CaseFileOrganizer:
         
     def log_message(self, message):
         self.logger.info(message)
-        self.log_text.insert(tk.END, f"{message}\n")
+        self.append_log_lines([message])
+        
+    def append_log_lines(self, messages):
+        """Append lines to the log view, keeping at most MAX_LOG_LINES"""
+        self.log_text.insert(tk.END, "\n".join(messages) + "\n")
+        line_count = int(self.log_text.index('end-1c').split('.')[0])
+        if line_count > MAX_LOG_LINES:
+            self.log_text.delete('1.0', f"{line_count - MAX_LOG_LINES}.0")
         self.log_text.see(tk.END)
         
     def run(self):
@@ -0,0 +1,399 @@
+"""Command-line entry point for batch organizing without the GUI.
+
+Examples:
+    python src/cli.py /shares/intake -p ACC -p HRER --no-backup --format ndjson
+    python src/cli.py patterns import catalog.csv
+    python src/cli.py patterns export catalog.json
+    python src/cli.py undo /shares/intake 20240501_093000_a1b2c3
+    python src/cli.py watch /shares/intake /shares/scans --all
+    python src/cli.py jobs shares.json --max-workers 8 --per-device 2
+"""
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+
+from core.config_manager import ConfigManager, PatternImportError
+from core.engine import OrganizerEngine, OrganizerOptions
+from core.collisions import COLLISION_POLICIES
+from core.dedupe import DEDUPE_ACTIONS
+from core.journal import journal_path_for, undo_run
+from core.watcher import FolderWatcher
+from core.jobs import JobScheduler, JobSpecError, load_job_spec
+from utils.logger import Logger
+
+
+def add_common_arguments(parser):
+    """Pattern selection and move options shared by organize and watch"""
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument("-p", "--pattern", action="append", dest="patterns",
+                           metavar="NAME",
+                           help="Pattern name from the config file (may be repeated)")
+    selection.add_argument("--all", dest="all_patterns", action="store_true",
+                           help="Organize using every pattern in the config file")
+    parser.add_argument("--config", default="file_patterns.json",
+                        help="Pattern configuration file (default: %(default)s)")
+    parser.add_argument("--backup", dest="backup_before_move", action="store_true",
+                        default=None, help="Create a backup of each file before moving it")
+    parser.add_argument("--no-backup", dest="backup_before_move", action="store_false",
+                        help="Do not create backups")
+    parser.add_argument("--backup-root", default=None,
+                        help="Folder for backups (default: .backups inside the directory)")
+    parser.add_argument("--backup-method", choices=["auto", "reflink", "hardlink", "copy"],
+                        default="auto", help="How backups are made (default: %(default)s)")
+    parser.add_argument("--year-folders", dest="create_year_folders", action="store_true",
+                        default=None, help="Create year folders (default from config)")
+    parser.add_argument("--no-year-folders", dest="create_year_folders", action="store_false",
+                        help="Drop {year} folders from the pattern's folder format")
+    parser.add_argument("--no-journal", dest="journal", action="store_false",
+                        help="Do not write a run journal (the run cannot be undone)")
+    parser.add_argument("--journal-dir", default=None,
+                        help="Folder for run journals (default: .organizer/journal inside the directory)")
+    parser.add_argument("--on-collision", choices=list(COLLISION_POLICIES), default="suffix",
+                        help="When the target name is taken: rename to 'name (1).ext', skip, "
+                             "skip only identical files (hash) or overwrite (default: %(default)s)")
+    parser.add_argument("--fix-spaces", dest="fix_spaces", action="store_true",
+                        default=False, help="Collapse repeated spaces in filenames")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Add per-stage timings and counters to the JSON summary")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Keep live metrics in this JSON file during the run (implies --metrics)")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Log every file operation to stderr")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="case-file-organize",
+        description="Organize case files into pattern folders and print a JSON summary."
+    )
+    parser.add_argument("directory", help="Directory containing the files to organize")
+    add_common_arguments(parser)
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the directory's interrupted run, skipping files it already moved")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip files that did not match last time and have not changed since")
+    parser.add_argument("--dedupe", choices=list(DEDUPE_ACTIONS), default=None,
+                        help="Find files with identical content and link, skip or quarantine "
+                             "all but one of them (ignored with --dry-run)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Also organize files in nested folders")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of parallel move threads (default: %(default)s)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Maximum queued moves when running in parallel (default: 4 per worker)")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="Print the move plan without touching the filesystem")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="Output format for the summary (default: %(default)s)")
+    return parser
+
+
+def setup_logging(verbose):
+    # Console only; the queued backend keeps stderr writes off the move path
+    return Logger(logging.INFO if verbose else logging.WARNING, log_dir=None).get_logger()
+
+
+def get_options(args, config_manager, **overrides):
+    overrides.update({
+        'fix_spaces': args.fix_spaces,
+        'backup_root': args.backup_root,
+        'backup_method': args.backup_method,
+        'journal': args.journal,
+        'journal_dir': args.journal_dir,
+        'on_collision': args.on_collision,
+        'metrics': args.metrics or bool(args.metrics_file),
+        'metrics_file': args.metrics_file
+    })
+    if args.backup_before_move is not None:
+        overrides['backup_before_move'] = args.backup_before_move
+    if args.create_year_folders is not None:
+        overrides['create_year_folders'] = args.create_year_folders
+    return OrganizerOptions.from_settings(config_manager, **overrides)
+
+
+def select_patterns(args, config_manager):
+    """Compiled patterns chosen with -p/--all, or None if one is unknown"""
+    if args.all_patterns:
+        return config_manager.get_compiled_patterns()
+    patterns = {}
+    for pattern_name in args.patterns:
+        pattern = config_manager.get_compiled_pattern(pattern_name)
+        if not pattern:
+            print(f"case-file-organize: error: pattern '{pattern_name}' not found", file=sys.stderr)
+            return None
+        patterns[pattern_name] = pattern
+    return patterns
+
+
+def summarize(runs, elapsed):
+    summary = {'type': 'summary'}
+    for key in ('scanned', 'matched', 'moved', 'failed', 'skipped', 'backups'):
+        summary[key] = sum(run.get(key, 0) for run in runs)
+    summary['elapsed'] = round(elapsed, 3)
+    return summary
+
+
+def write_output(runs, summary, output_format, stream):
+    if output_format == "ndjson":
+        for run in runs:
+            stream.write(json.dumps(dict(run, type='run')) + "\n")
+        stream.write(json.dumps(summary) + "\n")
+    else:
+        json.dump({'summary': summary, 'runs': runs}, stream, indent=2)
+        stream.write("\n")
+    stream.flush()
+
+
+def write_plan(plan, elapsed, output_format, stream):
+    summary = dict(plan.summary(), type='summary', dry_run=True, elapsed=round(elapsed, 3))
+    if output_format == "ndjson":
+        for operation in plan.operations:
+            stream.write(json.dumps(dict(operation.to_dict(), type='move')) + "\n")
+        for collision in plan.collisions:
+            stream.write(json.dumps(dict(collision, type='collision')) + "\n")
+        for error in plan.errors:
+            stream.write(json.dumps(dict(error, type='error')) + "\n")
+        stream.write(json.dumps(summary) + "\n")
+    else:
+        json.dump({'summary': summary, 'plan': plan.to_dict()}, stream, indent=2)
+        stream.write("\n")
+    stream.flush()
+
+
+def build_patterns_parser():
+    parser = argparse.ArgumentParser(
+        prog="case-file-organize patterns",
+        description="Bulk import or export pattern definitions."
+    )
+    parser.add_argument("--config", default="file_patterns.json",
+                        help="Pattern configuration file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Validate and import patterns from a file")
+    import_parser.add_argument("file", help="JSON or CSV file with pattern definitions")
+    import_parser.add_argument("--replace", action="store_true",
+                               help="Replace all existing patterns instead of merging")
+
+    export_parser = commands.add_parser("export", help="Export patterns to a file")
+    export_parser.add_argument("file", help="Target JSON or CSV file")
+    export_parser.add_argument("-p", "--pattern", action="append", dest="patterns",
+                               metavar="NAME", help="Only export these patterns")
+
+    for command in (import_parser, export_parser):
+        command.add_argument("--file-format", choices=["json", "csv"], default=None,
+                             help="File format (default: from the file extension)")
+    return parser
+
+
+def patterns_main(argv, stream):
+    args = build_patterns_parser().parse_args(argv)
+    config_manager = ConfigManager(args.config)
+
+    try:
+        if args.command == "import":
+            patterns = config_manager.read_patterns_file(args.file, args.file_format)
+            count = config_manager.import_patterns(patterns, replace=args.replace)
+            report = {'imported': count}
+        else:
+            count = config_manager.write_patterns_file(args.file, args.patterns, args.file_format)
+            report = {'exported': count}
+    except PatternImportError as e:
+        report = {'imported': 0, 'errors': e.errors}
+    except (OSError, ValueError) as e:
+        report = {'errors': [{'pattern': None, 'error': str(e)}]}
+
+    json.dump(report, stream, indent=2)
+    stream.write("\n")
+    stream.flush()
+    return 1 if report.get('errors') else 0
+
+
+def build_undo_parser():
+    parser = argparse.ArgumentParser(
+        prog="case-file-organize undo",
+        description="Move every file of an earlier run back where it came from."
+    )
+    parser.add_argument("directory", help="Directory the run organized")
+    parser.add_argument("run_id", help="Run id from the run's JSON summary")
+    parser.add_argument("--journal-dir", default=None,
+                        help="Folder for run journals (default: .organizer/journal inside the directory)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of parallel restore threads (default: %(default)s)")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Log every restored file to stderr")
+    return parser
+
+
+def undo_main(argv, stream):
+    args = build_undo_parser().parse_args(argv)
+    logger = setup_logging(args.verbose)
+    journal_path = journal_path_for(args.directory, args.run_id, args.journal_dir)
+    if not os.path.isfile(journal_path):
+        print(f"case-file-organize: error: no journal for run {args.run_id}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    report = undo_run(journal_path, workers=args.workers, logger=logger, directory=args.directory)
+    report['elapsed'] = round(time.perf_counter() - start, 3)
+
+    json.dump(report, stream, indent=2)
+    stream.write("\n")
+    stream.flush()
+    return 1 if report['failed'] or report['conflicts'] else 0
+
+
+def build_watch_parser():
+    parser = argparse.ArgumentParser(
+        prog="case-file-organize watch",
+        description="Organize files as they arrive until interrupted, then print a JSON summary."
+    )
+    parser.add_argument("directories", nargs="+", metavar="DIRECTORY",
+                        help="Directories to watch")
+    add_common_arguments(parser)
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Seconds a file must stay unchanged before it is moved (default: %(default)s)")
+    parser.add_argument("--queue-size", type=int, default=1000,
+                        help="Maximum files waiting to be moved (default: %(default)s)")
+    parser.add_argument("--poll", action="store_true",
+                        help="Rescan periodically instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between rescans when polling (default: %(default)s)")
+    return parser
+
+
+def watch_main(argv, stream):
+    args = build_watch_parser().parse_args(argv)
+    logger = setup_logging(args.verbose)
+    for directory in args.directories:
+        if not os.path.isdir(directory):
+            print(f"case-file-organize: error: not a directory: {directory}", file=sys.stderr)
+            return 2
+
+    config_manager = ConfigManager(args.config)
+    patterns = select_patterns(args, config_manager)
+    if patterns is None:
+        return 2
+
+    watcher = FolderWatcher(args.directories, patterns, get_options(args, config_manager),
+                            logger=logger, debounce=args.debounce,
+                            queue_size=max(1, args.queue_size), use_inotify=not args.poll,
+                            poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop_event.set())
+    start = time.perf_counter()
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+    runs = watcher.summary()
+    summary = summarize(runs, time.perf_counter() - start)
+    write_output(runs, summary, "ndjson", stream)
+    return 1 if summary['failed'] else 0
+
+
+def build_jobs_parser():
+    parser = argparse.ArgumentParser(
+        prog="case-file-organize jobs",
+        description="Organize many directories from a job spec and print one aggregated report."
+    )
+    parser.add_argument("spec", help="JSON job spec listing directories, patterns and options")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="Worker processes (default: one per job, up to the CPU count)")
+    parser.add_argument("--per-device", type=int, default=1,
+                        help="Maximum concurrent jobs on one filesystem (default: %(default)s)")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="Output format for the report (default: %(default)s)")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Log each finished job to stderr")
+    return parser
+
+
+def jobs_main(argv, stream):
+    args = build_jobs_parser().parse_args(argv)
+    logger = setup_logging(args.verbose)
+    try:
+        jobs = load_job_spec(args.spec)
+    except JobSpecError as e:
+        json.dump({'errors': e.errors}, stream, indent=2)
+        stream.write("\n")
+        return 2
+    except (OSError, ValueError) as e:
+        print(f"case-file-organize: error: {e}", file=sys.stderr)
+        return 2
+
+    scheduler = JobScheduler(jobs, args.max_workers, args.per_device)
+    report = scheduler.run(on_report=lambda job: logger.info(
+        f"Job {job['job']} ({job['directory']}) finished: {job.get('moved', 0)} moved"))
+
+    if args.format == "ndjson":
+        for job in report['jobs']:
+            stream.write(json.dumps(dict(job, type='job')) + "\n")
+        stream.write(json.dumps(dict(report['summary'], type='summary', devices=report['devices'])) + "\n")
+    else:
+        json.dump(report, stream, indent=2)
+        stream.write("\n")
+    stream.flush()
+    summary = report['summary']
+    return 1 if summary['failed'] or summary['failed_jobs'] else 0
+
+
+COMMANDS = {
+    'patterns': patterns_main,
+    'undo': undo_main,
+    'watch': watch_main,
+    'jobs': jobs_main
+}
+
+
+def main(argv=None, stream=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    stream = stream or sys.stdout
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:], stream)
+
+    args = build_parser().parse_args(argv)
+    logger = setup_logging(args.verbose)
+
+    if not os.path.isdir(args.directory):
+        print(f"case-file-organize: error: not a directory: {args.directory}", file=sys.stderr)
+        return 2
+
+    config_manager = ConfigManager(args.config)
+    options = get_options(args, config_manager, workers=max(1, args.workers),
+                          max_in_flight=args.max_in_flight, recursive=args.recursive,
+                          resume=args.resume, incremental=args.incremental, dedupe=args.dedupe)
+    patterns = select_patterns(args, config_manager)
+    if patterns is None:
+        return 2
+
+    # All selected patterns are matched in a single pass over the directory
+    start = time.perf_counter()
+    runs = []
+    engine = OrganizerEngine(options, logger=logger)
+
+    if args.dry_run:
+        plan = engine.plan_patterns(args.directory, patterns)
+        write_plan(plan, time.perf_counter() - start, args.format, stream)
+        return 1 if plan.errors else 0
+
+    try:
+        result = engine.process_patterns(args.directory, patterns)
+        runs.append(result.to_dict())
+    except Exception as e:
+        logger.error(f"Error during file organization: {str(e)}")
+        runs.append({'directory': args.directory, 'pattern': ",".join(patterns),
+                     'failed': 0, 'errors': [{'file': None, 'error': str(e)}]})
+
+    summary = summarize(runs, time.perf_counter() - start)
+    write_output(runs, summary, args.format, stream)
+
+    failed = summary['failed'] or any(run.get('errors') for run in runs)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import os
+import threading
+from collections import OrderedDict
+
+from utils.file_utils import DIR_CACHE_SIZE
+
+# What to do when a file with the target name is already in the folder:
+# rename the newcomer "name (1).ext", leave it where it is, leave it only
+# if both files have the same content (renaming it otherwise), or replace
+COLLISION_POLICIES = ("suffix", "skip", "hash", "overwrite")
+
+
+def suffixed_name(name, number):
+    """``ACC134.23.pdf`` -> ``ACC134.23 (1).pdf``"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem} ({number}){ext}"
+
+
+class TargetNameIndex:
+    """Names present in each target directory, listed once per run.
+
+    The first file sent to a directory lists it with a single scandir;
+    after that, whether a target name is taken is answered from memory
+    and names are added as files land, so the policy check costs no
+    stat per file. At most ``maxsize`` directories are remembered, but
+    a directory with names reserved by :meth:`claim` that have not yet
+    been settled by :meth:`landed` or :meth:`release` is never evicted,
+    since listing it again would miss them. Names are compared with
+    ``os.path.normcase``, so case-insensitive filesystems on Windows see
+    ``acc1.pdf`` and ``ACC1.pdf`` collide.
+
+    The index only knows about changes made through it; a file another
+    process drops into a target folder mid-run is not seen.
+    """
+
+    def __init__(self, maxsize=DIR_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        # Reservations per directory that have not landed yet
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.listed = 0
+
+    @staticmethod
+    def list_names(directory):
+        """The (normcased) names in ``directory``; called without the lock"""
+        names = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    names.add(os.path.normcase(entry.name))
+        except FileNotFoundError:
+            pass
+        return names
+
+    def evict(self):
+        """Drop least recently used directories without reservations; call with the lock held"""
+        excess = len(self.entries) - self.maxsize
+        if excess <= 0:
+            return
+        for directory in [d for d in self.entries if not self.in_flight.get(d)][:excess]:
+            del self.entries[directory]
+
+    def claim(self, directory, name, policy):
+        """Reserve a name for a file about to land in ``directory``.
+
+        Returns ``(name, action)``: ``new`` when the name was free,
+        ``renamed`` with a suffixed name, ``overwritten`` when the
+        existing file will be replaced, ``skipped`` (name None) when the
+        file should stay where it is, and ``exists`` for the ``hash``
+        policy, whose caller compares contents and claims again with
+        ``suffix`` if they differ. A ``new`` or ``renamed`` name must be
+        settled with :meth:`landed` or :meth:`release`.
+        """
+        listing = None
+        while True:
+            with self.lock:
+                names = self.entries.get(directory)
+                if names is None and listing is not None:
+                    # Another thread may have listed the directory meanwhile
+                    names = self.entries[directory] = listing
+                    self.listed += 1
+                if names is not None:
+                    self.entries.move_to_end(directory)
+                    claimed = self.reserve(directory, names, name, policy)
+                    self.evict()
+                    return claimed
+            # The directory is listed outside the lock so claims for
+            # other directories are not held up by the scandir
+            listing = self.list_names(directory)
+
+    def reserve(self, directory, names, name, policy):
+        key = os.path.normcase(name)
+        if key not in names:
+            action = "new"
+        elif policy == "skip":
+            return None, "skipped"
+        elif policy == "overwrite":
+            return name, "overwritten"
+        elif policy == "hash":
+            return name, "exists"
+        else:
+            number = 1
+            while os.path.normcase(suffixed_name(name, number)) in names:
+                number += 1
+            name = suffixed_name(name, number)
+            key = os.path.normcase(name)
+            action = "renamed"
+        names.add(key)
+        self.in_flight[directory] = self.in_flight.get(directory, 0) + 1
+        return name, action
+
+    def settle(self, directory):
+        count = self.in_flight.get(directory, 0) - 1
+        if count > 0:
+            self.in_flight[directory] = count
+        else:
+            self.in_flight.pop(directory, None)
+
+    def landed(self, directory):
+        """A reserved name now exists on disk"""
+        with self.lock:
+            self.settle(directory)
+
+    def release(self, directory, name):
+        """Give back a reserved name whose move failed"""
+        with self.lock:
+            self.settle(directory)
+            names = self.entries.get(directory)
+            if names is not None:
+                names.discard(os.path.normcase(name))
+
+    def discard(self, directory):
+        """Forget a directory, e.g. one removed during the run"""
+        with self.lock:
+            self.entries.pop(directory, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.in_flight.clear()
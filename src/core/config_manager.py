@@ -1,10 +1,111 @@
 import os
+import re
+import csv
+import copy
 import json
+import string
+import uuid
+from contextlib import contextmanager
+from types import MappingProxyType
 from pathlib import Path
 
+class CompiledPattern:
+    """Immutable, precompiled view of one pattern from the configuration.
+
+    The regex is compiled and the folder format parsed once, so callers
+    never go through the ``re`` module cache or ``str.format`` parsing
+    for each file.
+    """
+    __slots__ = ('name', 'regex', 'folder_format', 'description', 'data',
+                 'template', 'template_no_year')
+
+    def __init__(self, name, data):
+        folder_format = data['folder_format']
+        for attr, value in (
+            ('name', name),
+            ('regex', re.compile(data['regex'])),
+            ('folder_format', folder_format),
+            ('description', data.get('description', '')),
+            ('data', MappingProxyType(dict(data))),
+            ('template', self.parse_template(folder_format)),
+            ('template_no_year', self.parse_template(self.strip_year_folders(folder_format)))
+        ):
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledPattern is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledPattern is immutable")
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    @staticmethod
+    def strip_year_folders(folder_format):
+        """Drop path segments that consist only of the {year} placeholder"""
+        return '/'.join(p for p in re.split(r'[\\/]', folder_format) if p != '{year}')
+
+    @staticmethod
+    def parse_template(folder_format):
+        """Split a folder format into (literal, field) pairs.
+
+        Returns None when the format uses anything beyond plain
+        ``{year}``/``{number}`` fields, in which case str.format is used.
+        """
+        template = []
+        for literal, field, spec, conversion in string.Formatter().parse(folder_format):
+            if field is not None and (spec or conversion or field not in ('year', 'number')):
+                return None
+            template.append((literal, field))
+        return tuple(template)
+
+    def format_folder(self, year, number, create_year_folders=True):
+        """Render the relative target folder for one file.
+
+        When year folders are disabled, path segments that consist only
+        of the ``{year}`` placeholder are dropped.
+        """
+        template = self.template if create_year_folders else self.template_no_year
+        if template is None:
+            folder_format = self.folder_format
+            if not create_year_folders:
+                folder_format = self.strip_year_folders(folder_format)
+            return os.path.normpath(folder_format.format(year=year, number=number))
+
+        fields = {'year': year, 'number': number}
+        return os.path.normpath(''.join(
+            literal + fields[field] if field else literal for literal, field in template
+        ))
+
+    @classmethod
+    def coerce(cls, name, pattern):
+        """Return ``pattern`` as a CompiledPattern, compiling a raw dict if needed"""
+        if isinstance(pattern, cls):
+            return pattern
+        return cls(name, pattern)
+
+
+class PatternImportError(ValueError):
+    """Raised when a bulk pattern import fails validation.
+
+    ``errors`` lists every problem found, as ``{'pattern', 'error'}`` dicts.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid pattern(s)")
+
+
+CSV_FIELDS = ["name", "regex", "folder_format", "description", "sort_by"]
+
+
 class ConfigManager:
-    def __init__(self):
-        self.config_file = "file_patterns.json"
+    def __init__(self, config_file="file_patterns.json"):
+        self.config_file = config_file
         self.default_config = {
             "patterns": {
                 "ACC": {
@@ -32,10 +133,14 @@ class ConfigManager:
                 "backup_before_move": True
             }
         }
+        self.batch_depth = 0
+        self.batch_dirty = False
+        self.batch_snapshot = None
         self.config = self.load_config()
         
     def load_config(self):
         """Load configuration from file or create default"""
+        self.compiled_patterns = {}
         if os.path.exists(self.config_file):
             try:
                 with open(self.config_file, 'r') as f:
@@ -45,9 +150,67 @@ class ConfigManager:
         return self.default_config
         
     def save_config(self):
-        """Save configuration to file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        """Save configuration to file, or defer the write inside a batch"""
+        if self.batch_depth:
+            self.batch_dirty = True
+            return
+        self.commit()
+        
+    def commit(self):
+        """Write the configuration atomically.
+
+        The JSON is written to a temporary file in the same directory and
+        renamed over the config file, so readers never see a torn file.
+        The temporary file is created like a plain ``open`` would (0666
+        less the umask) and given the config file's mode when one exists.
+        """
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        name = os.path.basename(self.config_file)
+        temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:12]}.tmp")
+        fd = os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.config, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.chmod(temp_path, os.stat(self.config_file).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, self.config_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.batch_dirty = False
+        
+    @contextmanager
+    def batch(self):
+        """Group several updates into a single atomic write.
+
+        Every save inside the block is deferred until the outermost batch
+        exits; if the block raises, the in-memory configuration is rolled
+        back and nothing is written.
+        """
+        if self.batch_depth == 0:
+            self.batch_snapshot = copy.deepcopy(self.config)
+            self.batch_dirty = False
+        self.batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.config = self.batch_snapshot
+                self.batch_snapshot = None
+                self.batch_dirty = False
+                self.invalidate_pattern()
+            raise
+        self.batch_depth -= 1
+        if self.batch_depth == 0:
+            self.batch_snapshot = None
+            if self.batch_dirty:
+                self.commit()
             
     def get_all_patterns(self):
         """Get all patterns"""
@@ -57,19 +220,167 @@ class ConfigManager:
         """Get a specific pattern by name"""
         return self.config.get("patterns", {}).get(name)
         
+    def get_compiled_pattern(self, name):
+        """Get a precompiled, immutable pattern by name (cached)"""
+        compiled = self.compiled_patterns.get(name)
+        if compiled is None:
+            pattern = self.get_pattern(name)
+            if pattern is None:
+                return None
+            compiled = CompiledPattern(name, pattern)
+            self.compiled_patterns[name] = compiled
+        return compiled
+        
+    def get_compiled_patterns(self):
+        """Get all patterns as precompiled, immutable objects"""
+        return {name: self.get_compiled_pattern(name) for name in self.get_all_patterns()}
+        
+    def invalidate_pattern(self, name=None):
+        """Drop a cached compiled pattern, or all of them"""
+        if name is None:
+            self.compiled_patterns = {}
+        else:
+            self.compiled_patterns.pop(name, None)
+        
     def update_pattern(self, name, pattern_data):
         """Update or add a pattern"""
         if "patterns" not in self.config:
             self.config["patterns"] = {}
         self.config["patterns"][name] = pattern_data
+        self.invalidate_pattern(name)
         self.save_config()
         
     def delete_pattern(self, name):
         """Delete a pattern"""
         if name in self.config.get("patterns", {}):
             del self.config["patterns"][name]
+            self.invalidate_pattern(name)
             self.save_config()
             
+    @staticmethod
+    def validate_pattern(name, pattern_data):
+        """Return a list of problems with one pattern definition"""
+        errors = []
+        if not name:
+            errors.append("Pattern name is required")
+        if not isinstance(pattern_data, dict):
+            return errors + ["Pattern must be an object"]
+        regex = pattern_data.get("regex")
+        fmt = pattern_data.get("folder_format")
+        if not regex or not fmt:
+            return errors + ["Both regex and folder_format are required"]
+
+        groups = 0
+        try:
+            groups = re.compile(regex).groups
+        except re.error as e:
+            errors.append(f"Invalid regex pattern: {str(e)}")
+
+        try:
+            fields = {field for _, field, _, _ in string.Formatter().parse(fmt) if field is not None}
+        except ValueError as e:
+            return errors + [f"Invalid folder format: {str(e)}"]
+        unknown = fields - {"year", "number"}
+        if unknown:
+            errors.append(f"Folder format uses unknown placeholders: {', '.join(sorted(unknown))}")
+        if "number" not in fields:
+            errors.append("Folder format must contain the {number} placeholder")
+        elif not errors and groups < (2 if "year" in fields else 1):
+            errors.append("Regex needs a group for the number and, when {year} is used, a second group for the year")
+        return errors
+        
+    def import_patterns(self, patterns, replace=False):
+        """Validate and add many patterns with a single write.
+
+        Every pattern is validated before anything changes; if any is
+        invalid a :class:`PatternImportError` listing all problems is
+        raised and the configuration is left untouched. With ``replace``
+        the existing patterns are dropped first. Returns the number of
+        patterns imported.
+        """
+        if not isinstance(patterns, dict):
+            raise PatternImportError([{'pattern': None, 'error': "Patterns must be an object mapping names to patterns"}])
+        errors = []
+        for name, pattern_data in patterns.items():
+            for error in self.validate_pattern(name, pattern_data):
+                errors.append({'pattern': name, 'error': error})
+        if errors:
+            raise PatternImportError(errors)
+
+        with self.batch():
+            if replace:
+                self.config["patterns"] = {}
+                self.invalidate_pattern()
+            for name, pattern_data in patterns.items():
+                data = dict(pattern_data)
+                data.setdefault("description", "")
+                data.setdefault("sort_by", ["number", "year"])
+                self.update_pattern(name, data)
+        return len(patterns)
+        
+    def export_patterns(self, names=None):
+        """Return a copy of the patterns (all, or only ``names``)"""
+        patterns = self.get_all_patterns()
+        if names is not None:
+            patterns = {name: patterns[name] for name in names if name in patterns}
+        return copy.deepcopy(patterns)
+        
+    @staticmethod
+    def detect_format(path, file_format=None):
+        if file_format:
+            return file_format
+        return "csv" if str(path).lower().endswith(".csv") else "json"
+        
+    def read_patterns_file(self, path, file_format=None):
+        """Read patterns from a JSON or CSV file.
+
+        Raises :class:`PatternImportError` when the file does not hold a
+        name -> pattern mapping. A CSV is validated row by row, so a name
+        used on two rows is reported instead of the last row winning.
+        """
+        if self.detect_format(path, file_format) == "csv":
+            patterns = {}
+            errors = []
+            with open(path, newline='') as f:
+                # Row 1 is the header
+                for row_number, row in enumerate(csv.DictReader(f), start=2):
+                    name = (row.pop("name", "") or "").strip()
+                    sort_by = row.pop("sort_by", "") or "number;year"
+                    data = {key: (value or "").strip() for key, value in row.items() if key}
+                    data["sort_by"] = [part for part in sort_by.split(";") if part]
+                    if name in patterns:
+                        errors.append({'pattern': name, 'error': f"Duplicate pattern name on row {row_number}"})
+                    for error in self.validate_pattern(name, data):
+                        errors.append({'pattern': name, 'error': f"{error} (row {row_number})"})
+                    patterns.setdefault(name, data)
+            if errors:
+                raise PatternImportError(errors)
+            return patterns
+
+        with open(path) as f:
+            data = json.load(f)
+        # Accept either a full config file or a bare name -> pattern mapping
+        patterns = data.get("patterns", data) if isinstance(data, dict) else data
+        if not isinstance(patterns, dict):
+            raise PatternImportError([{'pattern': None, 'error': "Patterns must be an object mapping names to patterns"}])
+        return patterns
+        
+    def write_patterns_file(self, path, names=None, file_format=None):
+        """Write patterns to a JSON or CSV file; returns the number written"""
+        patterns = self.export_patterns(names)
+        if self.detect_format(path, file_format) == "csv":
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                for name, data in patterns.items():
+                    row = dict(data, name=name)
+                    row["sort_by"] = ";".join(data.get("sort_by", []))
+                    writer.writerow(row)
+        else:
+            with open(path, 'w') as f:
+                json.dump({"patterns": patterns}, f, indent=4)
+        return len(patterns)
+        
     def get_setting(self, name):
         """Get a setting value"""
         return self.config.get("settings", {}).get(name, False)
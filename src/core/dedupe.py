@@ -0,0 +1,185 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.file_utils import FileUtils, COPY_CHUNK_SIZE, STATE_DIR_NAME
+from utils.metrics import NULL_METRICS
+
+HASH_CACHE_NAME = "hashes.json"
+HASH_CACHE_VERSION = 1
+DUPLICATES_DIR_NAME = "duplicates"
+
+# What happens to a file whose content matches another candidate's:
+# hard-link it to the organized original, leave it where it is, or move
+# it to .organizer/duplicates/<run id>/
+DEDUPE_ACTIONS = ("link", "skip", "quarantine")
+
+# Bytes read for the partial hash that splits same-size groups
+PARTIAL_HASH_SIZE = 64 * 1024
+HASH_WORKERS = 4
+
+
+def hash_cache_path_for(directory):
+    return os.path.join(directory, STATE_DIR_NAME, HASH_CACHE_NAME)
+
+
+def quarantine_dir_for(directory, run_id):
+    return os.path.join(directory, STATE_DIR_NAME, DUPLICATES_DIR_NAME, run_id)
+
+
+def file_hash(path, limit=None, chunk_size=COPY_CHUNK_SIZE):
+    """BLAKE2b of a file's first ``limit`` bytes (all of it by default), read in chunks"""
+    digest = hashlib.blake2b(digest_size=20)
+    remaining = limit
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """Content hashes keyed by device and inode, reused while a file is unchanged.
+
+    Each entry holds the file's size and mtime (see
+    :meth:`FileUtils.file_key`) with its partial and full hash; a changed
+    size or mtime invalidates it. Because the key is the inode, an entry
+    follows the file through renames. Only entries used during a run are
+    kept when it is saved. Safe to use from hashing threads.
+    """
+
+    def __init__(self, path=None, entries=None):
+        self.path = path
+        self.previous = entries or {}
+        self.current = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """Read the cache at ``path``; a missing or corrupt cache is empty"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get('version') != HASH_CACHE_VERSION:
+            return cls(path)
+        return cls(path, data.get('entries'))
+
+    @staticmethod
+    def key(stat):
+        # Some filesystems report no inode numbers; such files are not cached
+        return f"{stat.st_dev}:{stat.st_ino}" if stat.st_ino else None
+
+    def get(self, stat, kind):
+        """Cached ``partial`` or ``full`` hash for an unchanged file, else None"""
+        key = self.key(stat)
+        if key is None:
+            return None
+        with self.lock:
+            entry = self.current.get(key) or self.previous.get(key)
+            if entry is None or tuple(entry[:2]) != FileUtils.file_key(stat):
+                return None
+            self.current[key] = entry
+            return entry[2] if kind == 'partial' else entry[3]
+
+    def put(self, stat, kind, value):
+        key = self.key(stat)
+        if key is None:
+            return
+        file_key = list(FileUtils.file_key(stat))
+        with self.lock:
+            entry = self.current.get(key)
+            if entry is None or entry[:2] != file_key:
+                entry = self.current[key] = file_key + [None, None]
+            entry[2 if kind == 'partial' else 3] = value
+
+    def save(self):
+        if self.path:
+            FileUtils.write_json_atomic(self.path, {
+                'version': HASH_CACHE_VERSION,
+                'entries': self.current
+            })
+
+
+class DuplicateFinder:
+    """Finds candidate files with identical content.
+
+    Candidates are grouped by size first, so a file with a unique size is
+    never read. Within a size group the first ``PARTIAL_HASH_SIZE`` bytes
+    are hashed, and only files whose partial hashes also agree are hashed
+    in full. Hashing runs on ``workers`` threads with chunked reads, and
+    hashes come from ``cache`` when a file has not changed.
+    """
+
+    def __init__(self, cache=None, workers=HASH_WORKERS, metrics=NULL_METRICS):
+        self.cache = cache if cache is not None else HashCache()
+        self.workers = max(1, workers)
+        self.metrics = metrics
+
+    def hash_one(self, path, stat, kind):
+        value = self.cache.get(stat, kind)
+        if value is not None:
+            self.metrics.add("hash_cache_hits")
+            return value
+        if kind == 'full' and stat.st_size <= PARTIAL_HASH_SIZE:
+            # The partial hash already covered the whole file
+            value = self.cache.get(stat, 'partial')
+        if value is None:
+            start = self.metrics.clock()
+            limit = PARTIAL_HASH_SIZE if kind == 'partial' else None
+            value = file_hash(path, limit)
+            self.metrics.record("hash", start)
+            self.metrics.add("bytes_hashed", min(stat.st_size, limit or stat.st_size))
+        self.cache.put(stat, kind, value)
+        return value
+
+    def split(self, groups, files, kind, pool):
+        """Split each group of keys by their ``kind`` hash; unreadable files drop out"""
+        def hash_key(key):
+            path, stat = files[key]
+            try:
+                return key, self.hash_one(path, stat, kind)
+            except OSError:
+                return key, None
+
+        # Hash every key of every group in one pass so small groups share the pool
+        hashes = dict(pool.map(hash_key, [key for group in groups for key in group]))
+        result = []
+        for group in groups:
+            by_hash = {}
+            for key in group:
+                if hashes[key] is not None:
+                    by_hash.setdefault(hashes[key], []).append(key)
+            result.extend(keys for keys in by_hash.values() if len(keys) > 1)
+        return result
+
+    def find(self, files):
+        """Groups of identical files.
+
+        ``files`` maps a key (such as a relative path) to ``(path, stat)``.
+        Returns lists of keys, each ordered so that the preferred original
+        (the shortest name, so ``ACC134.23.pdf`` before
+        ``ACC134.23 (1).pdf``) comes first. Empty files are ignored.
+        """
+        by_size = {}
+        for key, (_, stat) in files.items():
+            if stat.st_size:
+                by_size.setdefault(stat.st_size, []).append(key)
+        groups = [keys for keys in by_size.values() if len(keys) > 1]
+
+        if groups:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                groups = self.split(groups, files, 'partial', pool)
+                groups = self.split(groups, files, 'full', pool)
+
+        def preference(key):
+            name = os.path.basename(files[key][0])
+            return len(name), name, key
+        return sorted(sorted(group, key=preference) for group in groups)
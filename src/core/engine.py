@@ -0,0 +1,898 @@
+import os
+import re
+import time
+import logging
+import threading
+import uuid
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.config_manager import CompiledPattern
+from core.matcher import PatternMatcher
+from core.planner import MovePlan, MoveOperation
+from core.collisions import TargetNameIndex
+from core.dedupe import DuplicateFinder, HashCache, HASH_WORKERS, hash_cache_path_for, quarantine_dir_for
+from core.state_index import StateIndex, DIRENTRY_STAT_IS_FREE, index_path_for, pattern_signature
+from core.journal import Checkpoint, RunJournal, checkpoint_path_for, journal_path_for
+from utils.file_utils import FileUtils, DirectoryCache, MoveError, DIR_CACHE_SIZE, STATE_DIR_NAME
+from utils.backup import BackupManager, BACKUP_DIR_NAME
+from utils.metrics import RunMetrics, NULL_METRICS
+
+
+class OrganizerOptions:
+    """Options controlling a single organizing run"""
+
+    def __init__(self, backup_before_move=False, create_year_folders=True,
+                 sort_by_year=True, fix_spaces=False, workers=1, max_in_flight=None,
+                 recursive=False, backup_root=None, backup_method="auto",
+                 journal=True, journal_dir=None, resume=False, checkpoint_every=256,
+                 incremental=False, dir_cache_size=DIR_CACHE_SIZE,
+                 metrics=False, metrics_file=None, on_collision="suffix", dedupe=None,
+                 count_entries=False):
+        self.backup_before_move = backup_before_move
+        self.create_year_folders = create_year_folders
+        self.sort_by_year = sort_by_year
+        self.fix_spaces = fix_spaces
+        # Number of move threads; 1 keeps the original sequential loop
+        self.workers = workers
+        # Upper bound on queued moves, defaults to four per worker
+        self.max_in_flight = max_in_flight
+        # Also organize files in nested folders of the selected directory
+        self.recursive = recursive
+        # Where backups go (default: a .backups folder in the directory)
+        # and how they are made: auto, reflink, hardlink or copy
+        self.backup_root = backup_root
+        self.backup_method = backup_method
+        # Record every move in a run journal so the run can be undone
+        self.journal = journal
+        self.journal_dir = journal_dir
+        # Continue the directory's unfinished run instead of starting over;
+        # the checkpoint is refreshed every ``checkpoint_every`` files
+        self.resume = resume
+        self.checkpoint_every = checkpoint_every
+        # Skip files that did not match last time and have not changed since
+        self.incremental = incremental
+        # Number of target directories remembered as already created
+        self.dir_cache_size = dir_cache_size
+        # Collect per-stage timings and counters; metrics_file is rewritten
+        # with the live figures during the run
+        self.metrics = metrics
+        self.metrics_file = metrics_file
+        # What to do when the target name is taken: suffix, skip, hash or
+        # overwrite (see core.collisions)
+        self.on_collision = on_collision
+        # Find files with identical content before moving and link, skip
+        # or quarantine all but one of them (see core.dedupe); None is off
+        self.dedupe = dedupe
+        # With a progress callback, count the directory's entries on a
+        # second thread so an estimated total is known while scanning.
+        # This lists the directory twice; without it the total is None
+        # until the scan has finished
+        self.count_entries = count_entries
+
+    @classmethod
+    def from_settings(cls, config_manager, **overrides):
+        """Build options from the saved settings, with explicit overrides"""
+        options = cls(
+            backup_before_move=config_manager.get_setting('backup_before_move'),
+            create_year_folders=config_manager.get_setting('create_year_folders'),
+            sort_by_year=config_manager.get_setting('sort_by_year')
+        )
+        for name, value in overrides.items():
+            if not hasattr(options, name):
+                raise TypeError(f"Unknown option '{name}'")
+            setattr(options, name, value)
+        return options
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class OrganizerResult:
+    """Summary of an organizing run"""
+
+    def __init__(self, directory, pattern_name=None):
+        self.directory = directory
+        self.pattern_name = pattern_name
+        self.run_id = None
+        self.journal_path = None
+        self.resumed = 0
+        self.scanned = 0
+        self.scan_complete = False
+        self.unchanged = 0
+        self.matched = 0
+        self.moved = 0
+        self.failed = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.collisions = {}
+        self.backups = 0
+        self.backup_methods = {}
+        self.cancelled = False
+        self.errors = []
+        self.matched_by_pattern = {}
+        self.elapsed = 0.0
+        self.metrics = None
+
+    def add_match(self, pattern_name):
+        self.matched += 1
+        self.matched_by_pattern[pattern_name] = self.matched_by_pattern.get(pattern_name, 0) + 1
+
+    def add_error(self, filename, message, category=None):
+        self.failed += 1
+        error = {'file': filename, 'error': message}
+        if category:
+            error['category'] = category
+        self.errors.append(error)
+
+    def to_dict(self):
+        data = {
+            'run_id': self.run_id,
+            'directory': self.directory,
+            'pattern': self.pattern_name,
+            'journal': self.journal_path,
+            'resumed': self.resumed,
+            'scanned': self.scanned,
+            'unchanged': self.unchanged,
+            'matched': self.matched,
+            'matched_by_pattern': dict(self.matched_by_pattern),
+            'moved': self.moved,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'duplicates': self.duplicates,
+            'collisions': dict(self.collisions),
+            'backups': self.backups,
+            'backup_methods': dict(self.backup_methods),
+            'cancelled': self.cancelled,
+            'elapsed': round(self.elapsed, 3),
+            'errors': list(self.errors)
+        }
+        if self.metrics is not None:
+            data['metrics'] = self.metrics
+        return data
+
+
+class ProgressEstimate:
+    """Estimated number of matching files for a run that is still scanning.
+
+    The run scans and matches lazily, so the number of matches is only
+    known once its scan has finished; until then the total is None. When
+    a ``file_utils`` is given, a background thread also counts directory
+    entries (names only, nothing is kept) and the estimate is the match
+    rate seen so far applied to that count. That second listing costs as
+    much as the run's own scan, which is why it is opt-in.
+    """
+
+    def __init__(self, result, file_utils=None, directory=None, recursive=False, exclude=()):
+        self.result = result
+        self.count = 0
+        self.done = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        if file_utils is not None:
+            self.thread = threading.Thread(target=self.run, name="count-entries", daemon=True,
+                                           args=(file_utils, directory, recursive, exclude))
+            self.thread.start()
+
+    def run(self, file_utils, directory, recursive, exclude):
+        try:
+            for _ in file_utils.scan_entries(directory, recursive, exclude):
+                if self.stop_event.is_set():
+                    return
+                self.count += 1
+        except OSError:
+            return
+        self.done = True
+
+    def stop(self):
+        self.stop_event.set()
+
+    def total(self, scan_finished=False):
+        result = self.result
+        if scan_finished or result.scan_complete:
+            return result.matched
+        if self.thread is None or not result.scanned:
+            return None
+        entries = max(self.count, result.scanned)
+        return max(result.matched, round(result.matched * entries / result.scanned))
+
+
+class OrganizerEngine:
+    """Organizes files into pattern folders without any GUI dependency.
+
+    The engine reports progress and log lines through optional callbacks
+    so that the GUI, the command line and tests can all drive it.
+    """
+
+    def __init__(self, options=None, logger=None, message_callback=None):
+        self.options = options or OrganizerOptions()
+        self.logger = logger or logging.getLogger('CaseFileOrganizer')
+        self.message_callback = message_callback
+        self.file_utils = FileUtils()
+        self.cancel_event = threading.Event()
+        self.message_lock = threading.Lock()
+        self.created_dirs = DirectoryCache(self.options.dir_cache_size,
+                                           lambda path: self.file_utils.ensure_directory(path))
+        self.target_names = TargetNameIndex(self.options.dir_cache_size)
+        self.run_id = None
+        self.run_directory = None
+        self.backup_manager = None
+        self.journal = None
+        self.checkpoint = None
+        self.completed = frozenset()
+        self.processed = 0
+        self.state_index = None
+        self.landed = None
+        self.metrics = NULL_METRICS
+
+    def cancel(self):
+        """Request that the current run stops after the file in progress"""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def begin_run(self, directory, result=None):
+        """Assign a run id and set up per-run state: backups, journal and checkpoint.
+
+        With ``options.resume`` an unfinished run recorded in the
+        directory's checkpoint is continued under its original run id;
+        files its journal lists as moved are skipped without being stat'ed.
+        Paths recorded in the journal, checkpoint and backups are absolute,
+        so they stay valid from any working directory.
+        """
+        journaled = self.options.journal and result is not None
+        directory = os.path.abspath(directory)
+        self.run_directory = directory
+        self.created_dirs.clear()
+        self.target_names.clear()
+        if result is not None:
+            self.metrics = RunMetrics(self.options.metrics_file) if self.options.metrics else NULL_METRICS
+        self.completed = frozenset()
+        self.processed = 0
+        self.checkpoint = None
+        state = None
+        if journaled:
+            self.checkpoint = Checkpoint(checkpoint_path_for(directory, self.options.journal_dir))
+            if self.options.resume:
+                state = self.checkpoint.load()
+                if state and not os.path.isfile(state.get('journal', '')):
+                    state = None
+
+        if state:
+            self.run_id = state['run_id']
+            journal_path = state['journal']
+            self.completed = frozenset(RunJournal.completed_sources(journal_path))
+        else:
+            self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            journal_path = journal_path_for(directory, self.run_id, self.options.journal_dir)
+
+        self.backup_manager = None
+        if self.options.backup_before_move:
+            backup_root = os.path.abspath(self.options.backup_root or
+                                          os.path.join(directory, BACKUP_DIR_NAME))
+            self.backup_manager = BackupManager(os.path.join(backup_root, self.run_id),
+                                                directory, self.options.backup_method)
+
+        self.journal = None
+        if journaled:
+            self.journal = RunJournal(journal_path)
+            if state:
+                self.journal.write({'type': 'resume', 'time': time.time(),
+                                    'completed': len(self.completed)})
+                self.log_message(f"Resuming run {self.run_id}: "
+                                 f"{len(self.completed)} files already moved")
+            else:
+                self.journal.write({'type': 'run', 'run_id': self.run_id, 'directory': directory,
+                                    'started': time.time(), 'options': self.options.to_dict()})
+            result.journal_path = journal_path
+            result.resumed = len(self.completed)
+            self.save_checkpoint(result)
+        if result is not None:
+            result.run_id = self.run_id
+        return self.run_id
+
+    def save_checkpoint(self, result):
+        """Flush the journal, then record the run's progress in the checkpoint"""
+        self.journal.sync()
+        self.checkpoint.save({
+            'run_id': self.run_id,
+            'directory': self.run_directory,
+            'journal': self.journal.path,
+            'pattern': result.pattern_name,
+            'processed': self.processed + len(self.completed),
+            'moved': result.moved + len(self.completed),
+            'failed': result.failed,
+            'updated': time.time()
+        })
+
+    def end_run(self, result, completed=True):
+        """Finish the run journal and metrics; the checkpoint is kept unless the run completed"""
+        if self.metrics.enabled:
+            result.metrics = self.metrics.report()
+            self.metrics.write_live(force=True)
+        if self.journal is not None:
+            self.journal.write({'type': 'end', 'moved': result.moved, 'failed': result.failed,
+                                'cancelled': result.cancelled})
+            if completed:
+                self.journal.close()
+                self.checkpoint.clear()
+            else:
+                self.save_checkpoint(result)
+                self.journal.close()
+            self.journal = None
+            if result.moved:
+                self.log_message(f"Run {self.run_id} journaled; it can be undone with "
+                                 f"'case-file-organize undo'")
+
+    def log_message(self, message):
+        start = self.metrics.clock()
+        self.logger.info(message)
+        if self.message_callback:
+            with self.message_lock:
+                self.message_callback(message)
+        self.metrics.record("log", start)
+
+    def normalize_filename(self, filename):
+        """Apply the fix-spaces option to a filename"""
+        if self.options.fix_spaces:
+            return ' '.join(filename.split())
+        return filename
+
+    def process_files(self, directory, pattern, pattern_name=None, progress_callback=None):
+        """Organize every file in ``directory`` that matches ``pattern``.
+
+        ``progress_callback`` is called as ``(current, total, status)``.
+        Returns an :class:`OrganizerResult`.
+        """
+        pattern_name = pattern_name or pattern.get('name') or 'pattern'
+        return self.process_patterns(directory, {pattern_name: pattern}, progress_callback)
+
+    def process_patterns(self, directory, patterns, progress_callback=None):
+        """Organize ``directory`` against several patterns in a single pass.
+
+        Every filename is listed once and classified once by a combined
+        :class:`PatternMatcher`; the match is reused when the file is moved.
+        The directory is streamed: scanning, matching and moving overlap
+        and at most ``options.max_in_flight`` files are held at a time, so
+        memory does not grow with the directory. Progress is reported as
+        the count so far and a total that is None until the scan has
+        finished (or, with ``options.count_entries``, an estimate from a
+        second listing), with a final report at the exact total.
+        With ``options.dedupe`` the matches are collected first so that
+        duplicates can be found, and duplicates are handled after the
+        other files have been moved.
+        """
+        start = time.perf_counter()
+        result = OrganizerResult(directory, ",".join(patterns))
+        matcher = PatternMatcher(patterns)
+        patterns = matcher.patterns
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Directory not found: {directory}")
+        self.begin_run(directory, result)
+        if self.options.incremental:
+            self.state_index = StateIndex.load(index_path_for(directory),
+                                               pattern_signature(patterns, self.options))
+
+        completed = False
+        estimate = None
+        try:
+            matches = self.iter_matches(directory, patterns, matcher, result, self.completed)
+            duplicates = ()
+            if self.options.dedupe:
+                matches, duplicates = self.find_duplicates(directory, matches, result)
+
+            report = progress_callback
+            if progress_callback:
+                if self.options.count_entries:
+                    estimate = ProgressEstimate(result, self.file_utils, directory, self.options.recursive,
+                                                self.scan_exclusions(patterns))
+                else:
+                    estimate = ProgressEstimate(result)
+                last_total = [None]
+
+                def report(current, total, status):
+                    last_total[0] = estimate.total()
+                    progress_callback(current, last_total[0], status)
+                report(0, None, "Processing files...")
+
+            def worker(filename, match):
+                return self.process_single_file(directory, filename, match.pattern, match)
+
+            def duplicate_worker(filename, match, original):
+                return self.handle_duplicate(directory, filename, match, original)
+
+            self.execute(matches, worker, result, report, None)
+            if duplicates and not self.cancelled:
+                # Duplicates go last, once the originals they link to have landed
+                done = result.moved + result.failed + result.skipped
+                duplicate_report = None
+                if report:
+                    def duplicate_report(current, total, status):
+                        report(done + current, total, status)
+                self.execute(duplicates, duplicate_worker, result, duplicate_report, None)
+            completed = not self.cancelled
+            if estimate is not None and completed:
+                exact = estimate.total(scan_finished=True)
+                if last_total[0] != exact:
+                    progress_callback(result.moved + result.failed + result.skipped, exact, "Done")
+        finally:
+            self.landed = None
+            if estimate is not None:
+                estimate.stop()
+            result.cancelled = self.cancelled
+            self.end_run(result, completed)
+            if self.state_index is not None:
+                self.metrics.add("matches_avoided", result.unchanged)
+                self.state_index.save(completed)
+                self.state_index = None
+
+        if not result.matched:
+            self.log_message("No files found matching the pattern")
+        elif not result.cancelled:
+            self.log_message("File organization completed successfully")
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def find_duplicates(self, directory, matches, result):
+        """Split matches into files to organize and duplicates of them.
+
+        Every match is collected and stat'ed first, since duplicates can
+        only be told apart once whole size groups are known. Hashes are
+        kept in the directory's hash cache for the next run. Returns
+        ``(items, duplicates)``; duplicates are ``(filename, match, original)``.
+        """
+        metrics = self.metrics
+        matched = []
+        files = {}
+        for filename, match in matches:
+            matched.append((filename, match))
+            path = os.path.join(directory, filename)
+            start = metrics.clock()
+            try:
+                files[filename] = (path, os.stat(path))
+            except OSError:
+                pass
+            metrics.record("stat", start)
+
+        cache = HashCache.load(hash_cache_path_for(directory))
+        finder = DuplicateFinder(cache, max(self.options.workers, HASH_WORKERS), metrics)
+        originals = {}
+        for group in finder.find(files):
+            for filename in group[1:]:
+                originals[filename] = group[0]
+        try:
+            cache.save()
+        except OSError as e:
+            self.logger.warning(f"Could not save the hash cache: {str(e)}")
+
+        items = [(filename, match) for filename, match in matched if filename not in originals]
+        duplicates = [(filename, match, originals[filename])
+                      for filename, match in matched if filename in originals]
+        result.duplicates = len(duplicates)
+        metrics.add("duplicates", len(duplicates))
+        if duplicates:
+            self.log_message(f"Found {len(duplicates)} duplicate files")
+        self.landed = {} if self.options.dedupe == "link" else None
+        return items, duplicates
+
+    def plan_patterns(self, directory, patterns):
+        """Compute the full move plan for ``directory`` without any writes"""
+        plan = MovePlan(directory, ",".join(patterns))
+        result = OrganizerResult(directory)
+        matcher = PatternMatcher(patterns)
+        patterns = matcher.patterns
+
+        for filename, match in self.iter_matches(directory, patterns, matcher, result):
+            try:
+                target_dir, target_path = self.compute_target(directory, filename, match.pattern, match)
+            except Exception as e:
+                plan.add_error(filename, str(e))
+                continue
+            plan.add(MoveOperation(filename, match.name, os.path.join(directory, filename),
+                                   target_dir, target_path))
+
+        plan.scanned = result.scanned
+        plan.matched = result.matched
+        return plan
+
+    def execute_plan(self, plan, progress_callback=None):
+        """Carry out a :class:`MovePlan`, creating all target directories first"""
+        start = time.perf_counter()
+        result = OrganizerResult(plan.directory, plan.pattern_name)
+        self.begin_run(plan.directory, result)
+        result.scanned = plan.scanned
+        result.matched = plan.matched
+        for error in plan.errors:
+            result.add_error(error['file'], error['error'])
+
+        # Each directory is created exactly once; failures surface per file
+        for target_dir in plan.existing_directories:
+            self.created_dirs.add(target_dir)
+        for target_dir in sorted(plan.directories):
+            try:
+                self.created_dirs.ensure(target_dir)
+            except OSError as e:
+                self.logger.warning(f"Could not create {target_dir}: {str(e)}")
+
+        operations = [op for op in plan.operations if op.filename not in self.completed]
+        total = len(operations)
+        if progress_callback and total:
+            progress_callback(0, total, "Processing files...")
+
+        def worker(filename, operation):
+            return self.move_to_target(plan.directory, filename,
+                                       operation.target_dir, operation.target_path)
+
+        completed = False
+        try:
+            self.execute(((op.filename, op) for op in operations), worker,
+                         result, progress_callback, total)
+            completed = not self.cancelled
+        finally:
+            result.cancelled = self.cancelled
+            self.end_run(result, completed)
+
+        if not result.cancelled and total:
+            self.log_message("File organization completed successfully")
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    @staticmethod
+    def scan_exclusions(patterns):
+        """Top-level folders never scanned: backups, state and organized pattern folders"""
+        exclude = {BACKUP_DIR_NAME, STATE_DIR_NAME}
+        for pattern in patterns.values():
+            top = re.split(r'[\\/]', pattern.folder_format)[0]
+            if '{' not in top:
+                exclude.add(top)
+        return exclude
+
+    def iter_matches(self, directory, patterns, matcher, result, skip=frozenset()):
+        """Yield ``(relative_path, PatternMatch)`` while scanning ``directory``.
+
+        Paths in ``skip`` (already moved by a resumed run) are passed over
+        before matching. In incremental mode files the state index knows
+        as non-matching are passed over too, by name; their size and mtime
+        are only compared where the listing provides them for free.
+        """
+        index = self.state_index
+        if index is not None:
+            known, keep = index.previous, index.kept.append
+        metrics = self.metrics
+        entries = self.file_utils.scan_entries(directory, self.options.recursive,
+                                               self.scan_exclusions(patterns))
+        while True:
+            start = metrics.clock()
+            item = next(entries, None)
+            metrics.record("scan", start)
+            if item is None:
+                result.scan_complete = True
+                break
+            relative_path, entry = item
+            result.scanned += 1
+            if relative_path in skip:
+                metrics.add("resume_skipped")
+                continue
+            key = None
+            if index is not None:
+                if DIRENTRY_STAT_IS_FREE:
+                    try:
+                        key = self.file_utils.file_key(entry.stat())
+                    except OSError:
+                        pass
+                # StateIndex.is_known, inlined: this runs for every file
+                if relative_path in known and (key is None or index.unchanged(relative_path, key)):
+                    keep(relative_path)
+                    result.unchanged += 1
+                    continue
+
+            start = metrics.clock()
+            match = matcher.match(self.normalize_filename(entry.name))
+            metrics.record("match", start)
+            if match is not None:
+                result.add_match(match.name)
+                yield relative_path, match
+            elif index is not None:
+                index.add(relative_path, key)
+
+    def record_outcome(self, result, filename, outcome=None, error=None):
+        """Fold the outcome of one file into ``result`` (coordinating thread only)"""
+        if (self.journal is not None and self.processed
+                and self.processed % self.options.checkpoint_every == 0):
+            self.save_checkpoint(result)
+        self.processed += 1
+        if error is not None:
+            result.add_error(filename, str(error), getattr(error, 'category', None))
+            self.log_message(f"Error processing {filename}: {str(error)}")
+            if self.journal is not None:
+                self.journal.write({'type': 'move', 'src': filename, 'status': 'failed',
+                                    'error': str(error)})
+            return
+        collision = outcome[3]
+        if collision is not None:
+            result.collisions[collision] = result.collisions.get(collision, 0) + 1
+        if outcome[0] is None:
+            result.skipped += 1
+            if self.journal is not None:
+                self.journal.write({'type': 'move', 'src': filename, 'status': 'skipped',
+                                    'collision': collision})
+            return
+        result.moved += 1
+        if self.landed is not None:
+            self.landed[filename] = outcome[0]
+        self.metrics.write_live()
+        if self.journal is not None:
+            start = self.metrics.clock()
+            self.journal.write({
+                'type': 'move',
+                'src': filename,
+                'dst': os.path.relpath(outcome[0], self.run_directory),
+                'backup': outcome[1],
+                'status': 'moved'
+            })
+            self.metrics.record("journal", start)
+        backup_method = outcome[2]
+        if backup_method is not None:
+            result.backups += 1
+            result.backup_methods[backup_method] = result.backup_methods.get(backup_method, 0) + 1
+
+    def execute_sequential(self, items, worker, result, progress_callback=None, total=None):
+        """Run ``worker(*item)`` for each item; ``item[0]`` is the relative filename"""
+        for i, item in enumerate(items):
+            if self.cancelled:
+                break
+
+            filename = item[0]
+            try:
+                outcome = worker(*item)
+                self.record_outcome(result, filename, outcome)
+            except Exception as e:
+                self.record_outcome(result, filename, error=e)
+
+            if progress_callback:
+                start = self.metrics.clock()
+                progress_callback(i + 1, total, f"Processing {filename}")
+                self.metrics.record("progress", start)
+
+    def execute_parallel(self, items, worker, result, progress_callback=None, total=None):
+        """Run ``worker(*item)`` for each item on a bounded thread pool.
+
+        At most ``options.max_in_flight`` moves are queued at once. Results,
+        progress and cancellation are handled on the calling thread so
+        callbacks never run concurrently.
+        """
+        max_in_flight = self.options.max_in_flight or self.options.workers * 4
+        completed = 0
+        in_flight = {}
+
+        def collect(futures):
+            nonlocal completed
+            for future in futures:
+                filename = in_flight.pop(future)
+                error = future.exception()
+                self.record_outcome(result, filename, None if error else future.result(), error)
+                completed += 1
+                if progress_callback:
+                    start = self.metrics.clock()
+                    progress_callback(completed, total, f"Processing {filename}")
+                    self.metrics.record("progress", start)
+
+        with ThreadPoolExecutor(max_workers=self.options.workers) as pool:
+            for item in items:
+                if self.cancelled:
+                    break
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight[pool.submit(worker, *item)] = item[0]
+
+            # Let moves that already started finish, even when cancelled
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+    def execute(self, items, worker, result, progress_callback=None, total=None):
+        if self.options.workers > 1:
+            self.execute_parallel(items, worker, result, progress_callback, total)
+        else:
+            self.execute_sequential(items, worker, result, progress_callback, total)
+
+    def ensure_target_dir(self, path):
+        """Create a target directory once per run, safely across workers"""
+        start = self.metrics.clock()
+        if self.created_dirs.ensure(path):
+            self.metrics.record("mkdir", start)
+            self.metrics.add("makedirs")
+        else:
+            self.metrics.add("makedirs_avoided")
+
+    def process_single_file(self, directory, filename, pattern, match=None):
+        """Move one file into its pattern folder, raising on failure.
+
+        ``filename`` is relative to ``directory`` and may include
+        subfolders in recursive mode. ``match`` may be a :class:`PatternMatch`
+        from a previous classification; otherwise the filename is matched here.
+        Returns ``(target_path, backup_path, backup_method, collision)``;
+        the backup fields are None when backups are disabled, and
+        ``collision`` is None unless the target name was already taken,
+        in which case it names what ``options.on_collision`` did. A file
+        left in place has a None ``target_path``.
+        """
+        target_dir, target_path = self.compute_target(directory, filename, pattern, match)
+        return self.move_to_target(directory, filename, target_dir, target_path)
+
+    def compute_target(self, directory, filename, pattern, match=None):
+        """Return ``(target_dir, target_path)`` for one file without touching the disk"""
+        pattern = CompiledPattern.coerce(pattern.get('name', ''), pattern)
+
+        # Extract information from filename
+        target_name = self.normalize_filename(os.path.basename(filename))
+        if match is None:
+            match = pattern.regex.match(target_name)
+            if not match:
+                raise ValueError("Filename does not match pattern")
+            groups = match.groups()
+        else:
+            groups = match.groups
+
+        # Get the number and year from the match
+        number = groups[0] if groups else ""
+        year = "20" + groups[1] if len(groups) > 1 and groups[1] else ""  # Convert 2-digit year to 4-digit
+
+        # Create target directory using the pattern's folder format
+        target_dir = os.path.join(directory, pattern.format_folder(
+            year, number, self.options.create_year_folders
+        ))
+        return target_dir, os.path.join(target_dir, target_name)
+
+    def claim_target(self, file_path, target_dir, target_path):
+        """Settle the final name against the names already in the target folder.
+
+        If the target name is already taken (going by the run's
+        :class:`TargetNameIndex`, not a stat) ``options.on_collision``
+        decides whether the file is renamed, skipped, compared or replaces
+        it. Returns ``(target_path, action)``; the path is None when the
+        file stays where it is.
+        """
+        name = os.path.basename(target_path)
+        if target_path == file_path:
+            action = "new"
+        else:
+            name, action = self.target_names.claim(target_dir, name, self.options.on_collision)
+        if action == "exists":
+            try:
+                duplicate = self.file_utils.same_content(file_path, target_path)
+            except OSError:
+                duplicate = False
+            if duplicate:
+                name, action = None, "duplicate"
+            else:
+                name, action = self.target_names.claim(target_dir, name, "suffix")
+        if action != "new":
+            self.metrics.add(f"collisions_{action}")
+        if name is None:
+            same = "an identical file" if action == "duplicate" else os.path.basename(target_path)
+            self.log_message(f"Skipped {file_path}: {same} already exists in {target_dir}")
+            return None, action
+        return os.path.join(target_dir, name), action
+
+    @contextmanager
+    def reservation(self, target_dir, target_path, action):
+        """Settle a name reserved by :meth:`claim_target` once the file lands or fails to"""
+        if action not in ("new", "renamed"):
+            yield
+            return
+        try:
+            yield
+        except BaseException:
+            self.target_names.release(target_dir, os.path.basename(target_path))
+            raise
+        self.target_names.landed(target_dir)
+
+    def move_to_target(self, directory, filename, target_dir, target_path, backup=True):
+        """Back up (if enabled) and move one file to a precomputed target"""
+        file_path = os.path.join(directory, filename)
+        if self.options.backup_before_move and self.backup_manager is None:
+            self.begin_run(directory)
+        metrics = self.metrics
+
+        target_path, action = self.claim_target(file_path, target_dir, target_path)
+        collision = None if action == "new" else action
+        if target_path is None:
+            return None, None, None, collision
+
+        with self.reservation(target_dir, target_path, action):
+            # Create backup if enabled
+            backup_path = backup_method = None
+            if backup and self.backup_manager is not None:
+                start = metrics.clock()
+                backup_path, backup_method = self.backup_manager.create_backup(file_path)
+                metrics.record("backup", start)
+                metrics.add(f"backups_{backup_method}")
+                if backup_method == "copy" and metrics.enabled:
+                    metrics.add("bytes_copied", os.path.getsize(backup_path))
+                self.log_message(f"Created backup: {backup_path}")
+
+            # Ensure the target directory exists
+            self.ensure_target_dir(target_dir)
+
+            # Move file; a plain rename unless the target is on another device
+            start = metrics.clock()
+            overwrite = action == "overwritten"
+            moved = self.file_utils.move(file_path, target_path, overwrite=overwrite)
+            if not moved and moved.category == "not_found" and os.path.lexists(file_path):
+                # The cached target directory was removed during the run
+                self.created_dirs.discard(target_dir)
+                self.ensure_target_dir(target_dir)
+                moved = self.file_utils.move(file_path, target_path, overwrite=overwrite)
+            metrics.record("move", start)
+            if not moved:
+                raise MoveError(moved)
+        metrics.add(f"moves_{moved.method}")
+        if moved.method == "copy" and metrics.enabled:
+            metrics.add("bytes_copied", os.path.getsize(target_path))
+        self.log_message(f"Moved {filename} to {target_path}")
+        return target_path, backup_path, backup_method, collision
+
+    def handle_duplicate(self, directory, filename, match, original):
+        """Deal with a file whose content matches ``original`` per ``options.dedupe``.
+
+        ``link`` puts a hard link to the organized original at the
+        duplicate's own target and removes the duplicate, ``skip`` leaves
+        it in place and ``quarantine`` moves it under
+        ``.organizer/duplicates/<run id>/``. Duplicates are never backed
+        up. Returns the same tuple as :meth:`process_single_file`.
+        """
+        action = self.options.dedupe
+        if action == "skip":
+            self.log_message(f"Skipped {filename}: duplicate of {original}")
+            return None, None, None, None
+        if action == "quarantine":
+            target_dir = os.path.join(quarantine_dir_for(directory, self.run_id),
+                                      os.path.dirname(filename))
+            target_path = os.path.join(target_dir, os.path.basename(filename))
+            return self.move_to_target(directory, filename, target_dir, target_path, backup=False)
+
+        target_dir, target_path = self.compute_target(directory, filename, match.pattern, match)
+        source = self.landed.get(original) if self.landed else None
+        if source is None:
+            # The original was not organized this run; move the file as usual
+            return self.move_to_target(directory, filename, target_dir, target_path)
+        return self.link_to_target(directory, filename, source, target_dir, target_path)
+
+    def link_to_target(self, directory, filename, source, target_dir, target_path):
+        """Replace a duplicate with a hard link to ``source`` at its target.
+
+        Falls back to moving the duplicate where hard links are not
+        supported (FAT, some SMB shares).
+        """
+        file_path = os.path.join(directory, filename)
+        target_path, action = self.claim_target(file_path, target_dir, target_path)
+        collision = None if action == "new" else action
+        if target_path is None:
+            return None, None, None, collision
+
+        with self.reservation(target_dir, target_path, action):
+            self.ensure_target_dir(target_dir)
+            try:
+                if action == "overwritten":
+                    os.remove(target_path)
+                os.link(source, target_path)
+            except OSError:
+                moved = self.file_utils.move(file_path, target_path, overwrite=action == "overwritten")
+                if not moved:
+                    raise MoveError(moved)
+                self.metrics.add(f"moves_{moved.method}")
+                self.log_message(f"Moved {filename} to {target_path}")
+            else:
+                try:
+                    os.unlink(file_path)
+                except OSError:
+                    os.unlink(target_path)
+                    raise
+                self.metrics.add("links")
+                self.log_message(f"Linked {filename} to {target_path}")
+        return target_path, None, None, collision
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import logging
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from core.config_manager import ConfigManager
+from core.engine import OrganizerEngine, OrganizerOptions
+from utils.logger import Logger, LOGGER_NAME
+
+JOB_KEYS = {'directory', 'patterns', 'options', 'config', 'device'}
+SUMMARY_KEYS = ('scanned', 'matched', 'moved', 'failed', 'skipped', 'backups')
+
+
+class JobSpecError(ValueError):
+    """Raised when a job spec is invalid; ``errors`` lists every problem"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid job(s)")
+
+
+def load_job_spec(path):
+    """Read a job spec file and return its validated, defaults-merged jobs.
+
+    The file is JSON::
+
+        {
+          "config": "file_patterns.json",
+          "defaults": {"patterns": "all", "options": {"workers": 4}},
+          "jobs": [
+            {"directory": "//nas1/intake", "patterns": ["ACC", "HRER"]},
+            {"directory": "/mnt/scans", "options": {"backup_before_move": true},
+             "device": "scanner-share"}
+          ]
+        }
+
+    ``patterns`` is a list of names or ``"all"``; ``options`` are
+    :class:`OrganizerOptions` fields; ``device`` overrides the device a
+    job is throttled under (by default the directory's filesystem).
+    Relative ``directory`` and ``config`` paths are taken from the spec
+    file's folder.
+    """
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    return parse_job_spec(spec, base_dir=os.path.dirname(os.path.abspath(path)))
+
+
+def parse_job_spec(spec, base_dir=None):
+    def resolve(path):
+        if base_dir and not os.path.isabs(path):
+            return os.path.join(base_dir, path)
+        return path
+
+    defaults = spec.get('defaults', {})
+    config = resolve(spec.get('config', 'file_patterns.json'))
+
+    jobs = []
+    errors = []
+    for index, entry in enumerate(spec.get('jobs', [])):
+        unknown = set(entry) - JOB_KEYS
+        if unknown:
+            errors.append({'job': index, 'error': f"Unknown keys: {', '.join(sorted(unknown))}"})
+            continue
+        if not entry.get('directory'):
+            errors.append({'job': index, 'error': "Missing 'directory'"})
+            continue
+        options = dict(defaults.get('options', {}), **entry.get('options', {}))
+        bad_options = [name for name in options if not hasattr(OrganizerOptions(), name)]
+        if bad_options:
+            errors.append({'job': index, 'error': f"Unknown options: {', '.join(bad_options)}"})
+            continue
+        patterns = entry.get('patterns', defaults.get('patterns', 'all'))
+        if patterns != 'all' and not (isinstance(patterns, list) and patterns):
+            errors.append({'job': index, 'error': "'patterns' must be a list of names or \"all\""})
+            continue
+        jobs.append({
+            'id': index,
+            'directory': resolve(entry['directory']),
+            'patterns': patterns,
+            'options': options,
+            'config': resolve(entry['config']) if entry.get('config') else config,
+            'device': entry.get('device')
+        })
+    if errors:
+        raise JobSpecError(errors)
+    if not jobs:
+        raise JobSpecError([{'job': None, 'error': "The spec has no jobs"}])
+    return jobs
+
+
+def device_key(job):
+    """Name of the filesystem a job runs against, for concurrency caps"""
+    if job.get('device'):
+        return str(job['device'])
+    try:
+        return f"dev:{os.stat(job['directory']).st_dev}"
+    except OSError:
+        return f"missing:{job['directory']}"
+
+
+def init_worker(log_level):
+    """Process pool initializer: give each worker its own logging.
+
+    A forked worker inherits the parent's queue handler but not the
+    thread that drains it, so that is dropped and a console logger with
+    its own listener is set up in its place.
+    """
+    Logger.detach()
+    Logger(log_level, log_dir=None)
+
+
+def run_job(job):
+    """Organize one job's directory; runs in a worker process"""
+    start = time.perf_counter()
+    report = {'job': job['id'], 'directory': job['directory'], 'device': job.get('device_key')}
+    try:
+        if not os.path.isdir(job['directory']):
+            raise FileNotFoundError(f"Directory not found: {job['directory']}")
+        config_manager = ConfigManager(job['config'])
+        if job['patterns'] == 'all':
+            patterns = config_manager.get_compiled_patterns()
+        else:
+            patterns = {}
+            for name in job['patterns']:
+                pattern = config_manager.get_compiled_pattern(name)
+                if not pattern:
+                    raise ValueError(f"Pattern '{name}' not found")
+                patterns[name] = pattern
+        options = OrganizerOptions.from_settings(config_manager, **job['options'])
+        result = OrganizerEngine(options).process_patterns(job['directory'], patterns)
+        report.update(result.to_dict())
+    except Exception as e:
+        report['errors'] = [{'file': None, 'error': str(e)}]
+        report['traceback'] = traceback.format_exc()
+    report['elapsed'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+class JobScheduler:
+    """Runs jobs on a process pool with a cap on concurrent jobs per device.
+
+    Jobs are queued per device. Whenever a worker is free, the next job
+    is taken from the device with the fewest running jobs that is below
+    ``per_device``, so one slow share cannot take every worker while
+    other shares wait.
+    """
+
+    def __init__(self, jobs, max_workers=None, per_device=1, runner=run_job):
+        self.jobs = jobs
+        self.max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+        self.per_device = max(1, per_device)
+        self.runner = runner
+        self.queues = {}
+        self.running = {}
+        for job in jobs:
+            key = job['device_key'] = device_key(job)
+            self.queues.setdefault(key, deque()).append(job)
+            self.running.setdefault(key, 0)
+
+    def next_job(self):
+        ready = [key for key, jobs in self.queues.items()
+                 if jobs and self.running[key] < self.per_device]
+        if not ready:
+            return None
+        key = min(ready, key=lambda k: self.running[k])
+        self.running[key] += 1
+        return self.queues[key].popleft()
+
+    def run(self, on_report=None):
+        """Run every job and return the aggregated report"""
+        start = time.perf_counter()
+        reports = []
+        in_flight = {}
+        log_level = logging.getLogger(LOGGER_NAME).getEffectiveLevel()
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker,
+                                 initargs=(log_level,)) as pool:
+            while True:
+                while len(in_flight) < self.max_workers:
+                    job = self.next_job()
+                    if job is None:
+                        break
+                    in_flight[pool.submit(self.runner, job)] = job
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    self.running[job['device_key']] -= 1
+                    try:
+                        report = future.result()
+                    except Exception as e:
+                        report = {'job': job['id'], 'directory': job['directory'],
+                                  'device': job['device_key'],
+                                  'errors': [{'file': None, 'error': str(e)}]}
+                    reports.append(report)
+                    if on_report:
+                        on_report(report)
+
+        reports.sort(key=lambda report: report['job'])
+        return aggregate(reports, time.perf_counter() - start)
+
+
+def aggregate(reports, elapsed):
+    """Combine per-job reports into one summary, with totals per device"""
+    summary = {key: sum(r.get(key, 0) for r in reports) for key in SUMMARY_KEYS}
+    failed_jobs = sum(1 for r in reports
+                      if any(error.get('file') is None for error in r.get('errors', ())))
+    summary.update(jobs=len(reports), failed_jobs=failed_jobs, elapsed=round(elapsed, 3))
+    devices = {}
+    for report in reports:
+        device = devices.setdefault(report.get('device'), dict.fromkeys(SUMMARY_KEYS, 0))
+        for key in SUMMARY_KEYS:
+            device[key] += report.get(key, 0)
+    return {'summary': summary, 'devices': devices, 'jobs': reports}
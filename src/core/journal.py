@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.file_utils import FileUtils, STATE_DIR_NAME
+
+JOURNAL_DIR_NAME = "journal"
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+def journal_dir_for(directory, journal_dir=None):
+    """Folder holding the run journals for an organized directory (absolute)"""
+    return os.path.abspath(journal_dir or os.path.join(directory, STATE_DIR_NAME, JOURNAL_DIR_NAME))
+
+
+def journal_path_for(directory, run_id, journal_dir=None):
+    return os.path.join(journal_dir_for(directory, journal_dir), f"{run_id}.ndjson")
+
+
+def checkpoint_path_for(directory, journal_dir=None):
+    return os.path.join(journal_dir_for(directory, journal_dir), CHECKPOINT_NAME)
+
+
+class RunJournal:
+    """Append-only NDJSON record of what a run did.
+
+    The first record describes the run, then one compact record per file
+    (``src`` and ``dst`` relative to the directory, the backup location
+    and the status), and finally an ``end`` record. Writes are buffered
+    and fsynced in batches of ``sync_every`` records or every
+    ``sync_interval`` seconds, whichever comes first.
+    """
+
+    def __init__(self, path, sync_every=256, sync_interval=1.0):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.file = open(path, 'a', encoding='utf-8')
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.pending += 1
+            if (self.pending >= self.sync_every
+                    or time.monotonic() - self.last_sync >= self.sync_interval):
+                self.sync_locked()
+
+    def sync(self):
+        with self.lock:
+            self.sync_locked()
+
+    def sync_locked(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.sync_locked()
+                self.file.close()
+
+    @staticmethod
+    def read(path):
+        """Yield journal records, ignoring a torn final line"""
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    @staticmethod
+    def completed_sources(path):
+        """Relative source paths the journaled run has already moved"""
+        return {record['src'] for record in RunJournal.read(path)
+                if record.get('type') == 'move' and record.get('status') == 'moved'}
+
+
+class Checkpoint:
+    """Small state file pointing at an unfinished run.
+
+    It is rewritten atomically at batch boundaries, right after the
+    journal has been fsynced, so every move it accounts for is already
+    on disk in the journal. A run that completes removes it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, state):
+        FileUtils.write_json_atomic(self.path, state)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def undo_run(journal_path, workers=4, logger=None, directory=None):
+    """Reverse every move recorded in a run journal.
+
+    Paths are resolved against ``directory``, by default the directory
+    named in the journal header. Moves are undone newest first on a thread pool. A file whose target
+    has disappeared is restored from its backup when one was made;
+    a source path that has been reused since is left alone and reported
+    as a conflict. Target folders left empty are removed afterwards.
+    Returns a summary dict.
+    """
+    records = list(RunJournal.read(journal_path))
+    header = next((r for r in records if r.get('type') == 'run'), None)
+    if header is None:
+        raise ValueError(f"Not a run journal: {journal_path}")
+    directory = os.path.abspath(directory or header['directory'])
+    moves = [r for r in records if r.get('type') == 'move' and r.get('status') == 'moved']
+    moves.reverse()
+
+    summary = {'run_id': header.get('run_id'), 'restored': 0, 'from_backup': 0,
+               'conflicts': 0, 'failed': 0, 'errors': []}
+    lock = threading.Lock()
+
+    def undo_move(record):
+        src = os.path.join(directory, record['src'])
+        dst = os.path.join(directory, record['dst'])
+        backup = record.get('backup')
+        if os.path.lexists(src):
+            return 'conflicts', f"{record['src']} already exists"
+        os.makedirs(os.path.dirname(src), exist_ok=True)
+        if os.path.lexists(dst):
+            moved = FileUtils.move(dst, src)
+            if moved:
+                return 'restored', None
+            return 'failed', str(moved)
+        if backup and os.path.exists(backup):
+            shutil.copy2(backup, src)
+            return 'from_backup', None
+        return 'failed', f"{record['dst']} no longer exists and there is no backup"
+
+    def run(record):
+        try:
+            status, error = undo_move(record)
+        except OSError as e:
+            status, error = 'failed', str(e)
+        with lock:
+            summary[status] += 1
+            if error:
+                summary['errors'].append({'file': record['src'], 'error': error})
+        if logger and status in ('restored', 'from_backup'):
+            logger.info(f"Restored {record['src']}")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(run, moves))
+
+    # Remove target folders the run created and that are now empty
+    target_dirs = {os.path.dirname(os.path.join(directory, r['dst'])) for r in moves}
+    root = directory
+    for target_dir in sorted(target_dirs, key=len, reverse=True):
+        path = os.path.abspath(target_dir)
+        while path.startswith(root + os.sep):
+            try:
+                os.rmdir(path)
+            except OSError:
+                break
+            path = os.path.dirname(path)
+
+    journal = RunJournal(journal_path)
+    journal.write({'type': 'undo', 'time': time.time(),
+                   'restored': summary['restored'] + summary['from_backup'],
+                   'failed': summary['failed'] + summary['conflicts']})
+    journal.close()
+    return summary
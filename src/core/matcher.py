@@ -0,0 +1,287 @@
+import re
+from array import array
+
+from core.config_manager import CompiledPattern
+
+# Numbered backreferences and conditionals would point at the wrong group
+# once a regex is embedded in the combined alternation
+GROUP_REFERENCE = re.compile(r'\\[1-9]|\\g<\d|\(\?\(\d')
+
+# Inline global flags such as (?i) apply to the whole combined regex, so
+# they would leak into every other pattern (Python 3.8 only warns)
+INLINE_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+
+# Characters that end the literal prefix of a regex, and quantifiers that
+# make the character before them optional or repeatable
+REGEX_SPECIAL = set('.^$*+?{}[]|()\\')
+QUANTIFIERS = set('*+?{')
+
+
+def literal_prefix(regex):
+    """Literal text every match of ``regex`` starts with ('' if there is none)"""
+    if '|' in regex:
+        return ''
+    prefix = []
+    i = 0
+    while i < len(regex):
+        char = regex[i]
+        step = 1
+        if char == '\\':
+            char = regex[i + 1:i + 2]
+            # \d, \w, \1 and friends are classes or references, not literals
+            if not char or char.isalnum():
+                break
+            step = 2
+        elif char in REGEX_SPECIAL:
+            break
+        if regex[i + step:i + step + 1] in QUANTIFIERS:
+            break
+        prefix.append(char)
+        i += step
+    return ''.join(prefix)
+
+
+class PatternMatch:
+    """Result of classifying one filename against a set of patterns"""
+    __slots__ = ('name', 'pattern', 'groups', 'span')
+
+    def __init__(self, name, pattern, groups, span):
+        self.name = name
+        self.pattern = pattern
+        self.groups = groups
+        self.span = span
+
+    def group(self, index):
+        """Return a capture group using re.Match numbering (starting at 1)"""
+        return self.groups[index - 1]
+
+
+class PrefixTrie:
+    """Character trie from literal prefixes to the pattern ids that need them.
+
+    ``candidates(name)`` walks ``name`` as far as the trie goes and
+    returns, in id order, every pattern whose prefix ``name`` starts with
+    plus the patterns without a prefix, which are always candidates.
+    """
+
+    def __init__(self, prefixes):
+        self.root = {}
+        unprefixed = [i for i, prefix in enumerate(prefixes) if not prefix]
+        for i, prefix in enumerate(prefixes):
+            if prefix:
+                node = self.root
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append(i)
+        self.finish(self.root, unprefixed)
+
+    def finish(self, node, inherited):
+        # Store each node's full candidate tuple under None so a lookup is one walk
+        ids = tuple(sorted(inherited + node.get(None, [])))
+        node[None] = ids
+        for char, child in node.items():
+            if char is not None:
+                self.finish(child, list(ids))
+
+    def first_chars(self):
+        """Characters every candidate name starts with, or None if any pattern has no prefix"""
+        if self.root[None]:
+            return None
+        return frozenset(char for char in self.root if char is not None)
+
+    def candidates(self, name):
+        node = self.root
+        for char in name:
+            child = node.get(char)
+            if child is None:
+                break
+            node = child
+        return node[None]
+
+
+class BatchClassification:
+    """Columnar result of :meth:`PatternMatcher.classify_batch`.
+
+    Row ``i`` describes ``names[i]``: ``pattern[i]`` indexes
+    ``pattern_names`` (-1 when nothing matched), ``number[i]`` and
+    ``year[i]`` are the first two capture groups as integers, the year
+    expanded to four digits (-1 when a group is missing or not numeric),
+    and the match spans ``(0, end[i])``. The columns are ``array``
+    objects of about 10 bytes per name in all.
+    """
+    __slots__ = ('pattern_names', 'pattern', 'number', 'year', 'end')
+
+    def __init__(self, pattern_names, size):
+        self.pattern_names = tuple(pattern_names)
+        self.pattern = array('h', [-1]) * size
+        self.number = array('i', [-1]) * size
+        self.year = array('h', [-1]) * size
+        self.end = array('H', [0]) * size
+
+    def __len__(self):
+        return len(self.pattern)
+
+    @property
+    def matched(self):
+        return len(self.pattern) - self.pattern.count(-1)
+
+    def counts(self):
+        """Number of matches per pattern name"""
+        return {name: self.pattern.count(i) for i, name in enumerate(self.pattern_names)}
+
+    def row(self, index):
+        """``(pattern_name, number, year, span)`` for one name, or None"""
+        pattern_id = self.pattern[index]
+        if pattern_id < 0:
+            return None
+        return (self.pattern_names[pattern_id], self.number[index], self.year[index],
+                (0, self.end[index]))
+
+
+class PatternMatcher:
+    """Classifies filenames against many patterns with a single regex.
+
+    All pattern regexes are compiled once into one alternation of the
+    form ``(pattern0)|(pattern1)|...``; the outer group that matched
+    identifies the pattern and its own groups are sliced back out, so a
+    filename is matched exactly once. First match wins, in config
+    order, exactly like calling ``re.match`` per pattern.
+
+    Patterns that cannot be combined (e.g. numbered backreferences,
+    inline flags such as ``(?i)`` or clashing group names) fall back to
+    being matched one by one.
+    ``patterns`` maps names to :class:`CompiledPattern` objects or raw
+    pattern dicts.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = {name: CompiledPattern.coerce(name, p) for name, p in patterns.items()}
+        self.compiled = {name: p.regex for name, p in self.patterns.items()}
+        self.combined = None
+        self.group_map = {}
+        self.build_combined()
+        # A case-insensitive regex has no literal prefix the trie could match
+        self.prefixes = PrefixTrie([
+            '' if regex.flags & re.IGNORECASE else literal_prefix(regex.pattern)
+            for regex in self.compiled.values()
+        ])
+
+    def build_combined(self):
+        regexes = self.compiled.values()
+        if any(GROUP_REFERENCE.search(regex.pattern) or INLINE_FLAGS.search(regex.pattern)
+               for regex in regexes):
+            return
+        if len({regex.flags for regex in regexes}) > 1:
+            return
+
+        parts = []
+        group_map = {}
+        index = 1
+        for name, regex in self.compiled.items():
+            parts.append(f"({regex.pattern})")
+            group_map[index] = (name, index + 1, index + 1 + regex.groups)
+            index += 1 + regex.groups
+        try:
+            self.combined = re.compile("|".join(parts)) if parts else None
+            self.group_map = group_map
+        except re.error:
+            self.combined = None
+            self.group_map = {}
+
+    def match(self, filename):
+        """Return a :class:`PatternMatch` for the first matching pattern, or None"""
+        if self.combined is not None:
+            m = self.combined.match(filename)
+            if not m:
+                return None
+            # The outer group of the matching alternative closes last
+            name, start, end = self.group_map[m.lastindex]
+            groups = m.groups()[start - 1:end - 1]
+            return PatternMatch(name, self.patterns[name], groups, m.span())
+
+        for name, regex in self.compiled.items():
+            m = regex.match(filename)
+            if m:
+                return PatternMatch(name, self.patterns[name], m.groups(), m.span())
+        return None
+
+    def classify(self, filenames):
+        """Yield ``(filename, PatternMatch)`` for every filename that matches"""
+        for filename in filenames:
+            result = self.match(filename)
+            if result is not None:
+                yield filename, result
+
+    def classify_batch(self, names):
+        """Classify a sequence of filenames into a :class:`BatchClassification`.
+
+        Meant for planning and reporting over very large listings: no
+        match objects or per-file dicts are kept. The first level of the
+        literal-prefix trie is a cheap first filter, so a name that no
+        pattern could start with never reaches a regex. A name that
+        passes is matched once by the combined regex, exactly like
+        :meth:`match`; only when patterns could not be combined are the
+        trie's candidates tried one by one, in config order.
+        """
+        batch = BatchClassification(self.patterns, len(names))
+        if self.combined is None:
+            self.classify_batch_separately(names, batch)
+            return batch
+
+        ids = {name: pattern_id for pattern_id, name in enumerate(self.patterns)}
+        # Outer group -> (pattern id, number group, year group); None when missing
+        groups_of = {index: (ids[name], start if start < stop else None,
+                             start + 1 if start + 1 < stop else None)
+                     for index, (name, start, stop) in self.group_map.items()}
+        first_chars = self.prefixes.first_chars()
+        combined = self.combined.match
+        pattern, number, year, end = batch.pattern, batch.number, batch.year, batch.end
+        i = -1
+        for name in names:
+            i += 1
+            if first_chars is not None and name[:1] not in first_chars:
+                continue
+            m = combined(name)
+            if m is None:
+                continue
+            pattern_id, number_group, year_group = groups_of[m.lastindex]
+            pattern[i] = pattern_id
+            end[i] = m.end()
+            # Missing, non-numeric or out-of-range groups stay -1
+            try:
+                number[i] = int(m.group(number_group))
+            except (IndexError, TypeError, ValueError, OverflowError):
+                pass
+            try:
+                value = int(m.group(year_group))
+                # Two-digit years are 20xx, as when computing targets
+                year[i] = value + 2000 if value < 100 else value
+            except (IndexError, TypeError, ValueError, OverflowError):
+                pass
+        return batch
+
+    def classify_batch_separately(self, names, batch):
+        """:meth:`classify_batch` for patterns that could not be combined"""
+        matchers = [regex.match for regex in self.compiled.values()]
+        candidates = self.prefixes.candidates
+        pattern, number, year, end = batch.pattern, batch.number, batch.year, batch.end
+        i = -1
+        for name in names:
+            i += 1
+            for pattern_id in candidates(name):
+                m = matchers[pattern_id](name)
+                if m is None:
+                    continue
+                pattern[i] = pattern_id
+                end[i] = m.end()
+                groups = m.groups()
+                try:
+                    number[i] = int(groups[0])
+                except (IndexError, TypeError, ValueError, OverflowError):
+                    pass
+                try:
+                    value = int(groups[1])
+                    year[i] = value + 2000 if value < 100 else value
+                except (IndexError, TypeError, ValueError, OverflowError):
+                    pass
+                break
@@ -1,7 +1,9 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import re
 
+from core.config_manager import PatternImportError
+
 class PatternManager:
     def __init__(self, parent, config_manager):
         self.window = tk.Toplevel(parent)
@@ -40,6 +42,8 @@ class PatternManager:
         ttk.Button(button_frame, text="Add Pattern", command=self.add_pattern).grid(row=0, column=0, padx=5)
         ttk.Button(button_frame, text="Edit Pattern", command=self.edit_pattern).grid(row=0, column=1, padx=5)
         ttk.Button(button_frame, text="Delete Pattern", command=self.delete_pattern).grid(row=0, column=2, padx=5)
+        ttk.Button(button_frame, text="Import...", command=self.import_patterns).grid(row=0, column=3, padx=5)
+        ttk.Button(button_frame, text="Export...", command=self.export_patterns).grid(row=0, column=4, padx=5)
         
         # Pattern editor frame
         editor_frame = ttk.LabelFrame(main_frame, text="Pattern Editor", padding="5")
@@ -165,9 +169,47 @@ class PatternManager:
         
         if messagebox.askyesno("Confirm", f"Are you sure you want to delete pattern '{pattern_name}'?"):
             try:
-                del self.config_manager.config["patterns"][pattern_name]
-                self.config_manager.save_config()
+                self.config_manager.delete_pattern(pattern_name)
                 self.load_patterns()
                 messagebox.showinfo("Success", "Pattern deleted successfully!")
             except Exception as e:
-                messagebox.showerror("Error", f"Error deleting pattern: {str(e)}") 
\ No newline at end of file
+                messagebox.showerror("Error", f"Error deleting pattern: {str(e)}")
+    
+    def import_patterns(self):
+        """Import many patterns from a JSON or CSV file"""
+        path = filedialog.askopenfilename(
+            parent=self.window,
+            filetypes=[("Pattern files", "*.json *.csv"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+            
+        try:
+            patterns = self.config_manager.read_patterns_file(path)
+            count = self.config_manager.import_patterns(patterns)
+        except PatternImportError as e:
+            details = "\n".join(f"{error['pattern']}: {error['error']}" for error in e.errors[:20])
+            messagebox.showerror("Error", f"No patterns were imported:\n{details}")
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Error importing patterns: {str(e)}")
+            return
+            
+        self.load_patterns()
+        messagebox.showinfo("Success", f"Imported {count} patterns.")
+    
+    def export_patterns(self):
+        """Export all patterns to a JSON or CSV file"""
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")]
+        )
+        if not path:
+            return
+            
+        try:
+            count = self.config_manager.write_patterns_file(path)
+            messagebox.showinfo("Success", f"Exported {count} patterns.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error exporting patterns: {str(e)}")
@@ -0,0 +1,92 @@
+import os
+
+
+class MoveOperation:
+    """One planned move of a file into its pattern folder"""
+    __slots__ = ('filename', 'pattern_name', 'source_path', 'target_dir', 'target_path')
+
+    def __init__(self, filename, pattern_name, source_path, target_dir, target_path):
+        self.filename = filename
+        self.pattern_name = pattern_name
+        self.source_path = source_path
+        self.target_dir = target_dir
+        self.target_path = target_path
+
+    def to_dict(self):
+        return {
+            'source': self.source_path,
+            'pattern': self.pattern_name,
+            'target_dir': self.target_dir,
+            'target': self.target_path
+        }
+
+
+class MovePlan:
+    """The full set of moves for a run, computed without writing anything.
+
+    Besides the operations themselves the plan records which target
+    directories still have to be created (each checked once) and any
+    collisions: targets that already exist on disk or that more than
+    one source would be moved to.
+    """
+
+    def __init__(self, directory, pattern_name=None):
+        self.directory = directory
+        self.pattern_name = pattern_name
+        self.scanned = 0
+        self.matched = 0
+        self.operations = []
+        self.directories = set()
+        self.existing_directories = set()
+        self.collisions = []
+        self.errors = []
+        self.targets = {}
+
+    def add(self, operation):
+        target_dir = operation.target_dir
+        if target_dir not in self.directories and target_dir not in self.existing_directories:
+            if os.path.isdir(target_dir):
+                self.existing_directories.add(target_dir)
+            else:
+                self.directories.add(target_dir)
+
+        target = operation.target_path
+        if target in self.targets:
+            self.collisions.append({
+                'target': target,
+                'sources': [self.targets[target], operation.source_path],
+                'reason': 'duplicate'
+            })
+        elif target_dir in self.existing_directories and os.path.lexists(target):
+            self.collisions.append({
+                'target': target,
+                'sources': [operation.source_path],
+                'reason': 'exists'
+            })
+        self.targets[target] = operation.source_path
+        self.operations.append(operation)
+
+    def add_error(self, filename, message):
+        self.errors.append({'file': filename, 'error': message})
+
+    def summary(self):
+        return {
+            'directory': self.directory,
+            'pattern': self.pattern_name,
+            'scanned': self.scanned,
+            'matched': self.matched,
+            'operations': len(self.operations),
+            'directories': len(self.directories),
+            'collisions': len(self.collisions),
+            'failed': len(self.errors)
+        }
+
+    def to_dict(self):
+        plan = self.summary()
+        plan.update({
+            'operations': [op.to_dict() for op in self.operations],
+            'directories': sorted(self.directories),
+            'collisions': list(self.collisions),
+            'errors': list(self.errors)
+        })
+        return plan
@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+
+from utils.file_utils import FileUtils, STATE_DIR_NAME
+
+INDEX_NAME = "index.json"
+INDEX_VERSION = 2
+
+# DirEntry.stat() is served from the directory listing on Windows; on
+# POSIX it is an extra stat call per file
+DIRENTRY_STAT_IS_FREE = os.name == 'nt'
+
+
+def index_path_for(directory):
+    return os.path.join(directory, STATE_DIR_NAME, INDEX_NAME)
+
+
+def pattern_signature(patterns, options):
+    """Fingerprint of everything that decides whether a filename matches.
+
+    Changing a pattern's regex, adding or removing a pattern, or toggling
+    fix-spaces or recursion changes the signature and discards the index.
+    """
+    data = {
+        'patterns': sorted((name, pattern.regex.pattern) for name, pattern in patterns.items()),
+        'fix_spaces': bool(options.fix_spaces),
+        'recursive': bool(options.recursive)
+    }
+    return hashlib.sha1(json.dumps(data).encode('utf-8')).hexdigest()
+
+
+class StateIndex:
+    """Per-directory record of files already classified as non-matching.
+
+    Whether a file matches depends only on its name and the pattern
+    signature, so entries are keyed by relative path and a known name is
+    skipped with a dict lookup instead of a stat. Where the size and
+    mtime come free with the directory listing (see
+    :data:`DIRENTRY_STAT_IS_FREE`) they are stored too, and a file whose
+    size or mtime changed is matched again; elsewhere the entry is None.
+    Only the entries seen during a run are kept when it completes, so
+    deleted files drop out of the index, and the file is only rewritten
+    when that changes anything.
+    """
+
+    def __init__(self, path, signature, entries=None):
+        self.path = path
+        self.signature = signature
+        self.previous = entries or {}
+        self.kept = []
+        self.added = {}
+
+    @classmethod
+    def load(cls, path, signature):
+        """Read the index at ``path``; a missing, corrupt or stale index is empty"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, signature)
+        if data.get('version') != INDEX_VERSION or data.get('signature') != signature:
+            return cls(path, signature)
+        return cls(path, signature, data.get('entries'))
+
+    def __len__(self):
+        return len(self.previous)
+
+    def unchanged(self, relative_path, key):
+        """False if a known file's stored size and mtime differ from ``key``"""
+        entry = self.previous[relative_path]
+        return entry is None or tuple(entry) == key
+
+    def is_known(self, relative_path, key=None):
+        """True if the file was non-matching last time (and, given a key, is unchanged).
+
+        A known file is carried over to the next index. The scan loop
+        inlines this check; see :meth:`OrganizerEngine.iter_matches`.
+        """
+        if relative_path not in self.previous:
+            return False
+        if key is not None and not self.unchanged(relative_path, key):
+            return False
+        self.kept.append(relative_path)
+        return True
+
+    def add(self, relative_path, key=None):
+        """Record a non-matching file for the next run"""
+        self.added[relative_path] = list(key) if key is not None else None
+
+    def save(self, complete=True):
+        """Write the index if it changed; an incomplete scan keeps the entries it did not reach.
+
+        Returns True if the file was written.
+        """
+        if complete:
+            changed = self.added or len(self.kept) != len(self.previous)
+        else:
+            changed = self.added
+        if not changed and os.path.exists(self.path):
+            return False
+        if complete:
+            entries = {path: self.previous[path] for path in self.kept}
+            entries.update(self.added)
+        else:
+            entries = dict(self.previous, **self.added)
+        FileUtils.write_json_atomic(self.path, {
+            'version': INDEX_VERSION,
+            'signature': self.signature,
+            'entries': entries
+        })
+        return True
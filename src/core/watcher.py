@@ -0,0 +1,302 @@
+import os
+import sys
+import time
+import errno
+import queue
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+from core.engine import OrganizerEngine, OrganizerResult
+from core.matcher import PatternMatcher
+from utils.file_utils import FileUtils
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+# How often pending files are re-checked while waiting for them to settle
+TICK_SECONDS = 0.25
+
+
+class InotifySource:
+    """New filenames in a set of directories, reported by Linux inotify.
+
+    ``poll`` returns ``(directory, filename)`` pairs, or None when the
+    kernel queue overflowed and the directories have to be rescanned.
+    """
+
+    def __init__(self, directories):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.directories = {}
+        try:
+            for directory in directories:
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+                if wd < 0:
+                    error = ctypes.get_errno()
+                    raise OSError(error, os.strerror(error), directory)
+                self.directories[wd] = directory
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def poll(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_ISDIR or wd not in self.directories or not name:
+                continue
+            events.append((self.directories[wd], os.fsdecode(name)))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingSource:
+    """Fallback that rescans the directories every ``interval`` seconds"""
+
+    def __init__(self, directories, interval=2.0):
+        self.directories = list(directories)
+        self.interval = interval
+        self.next_scan = 0.0
+        self.seen = {directory: {} for directory in self.directories}
+
+    def poll(self, timeout):
+        wait = self.next_scan - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            return []
+        self.next_scan = time.monotonic() + self.interval
+
+        events = []
+        for directory in self.directories:
+            previous = self.seen[directory]
+            current = {}
+            try:
+                for _, entry in FileUtils.scan_entries(directory):
+                    try:
+                        key = FileUtils.file_key(entry.stat())
+                    except OSError:
+                        continue
+                    current[entry.name] = key
+                    if previous.get(entry.name) != key:
+                        events.append((directory, entry.name))
+            except OSError:
+                continue
+            self.seen[directory] = current
+        return events
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """Organizes files as they arrive in one or more watched directories.
+
+    New names come from inotify where available and from periodic
+    rescans otherwise. A file is handed on only once its size and mtime
+    have not changed for ``debounce`` seconds, so files still being
+    copied in are left alone. Ready files go through a queue of at most
+    ``queue_size`` entries; when the mover falls behind, the watcher
+    thread blocks on it instead of buffering without limit. Moves use
+    the same :meth:`OrganizerEngine.process_single_file` path as a
+    normal run, with one engine (and journal) per directory.
+    """
+
+    def __init__(self, directories, patterns, options=None, logger=None, message_callback=None,
+                 debounce=2.0, queue_size=1000, use_inotify=True, poll_interval=2.0):
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.matcher = PatternMatcher(patterns)
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        self.poll_interval = poll_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.engines = {}
+        self.results = {}
+        for directory in self.directories:
+            engine = OrganizerEngine(options, logger, message_callback)
+            self.engines[directory] = engine
+            self.results[directory] = OrganizerResult(directory, ",".join(self.matcher.patterns))
+        self.pending = {}
+        # Paths handed to the mover and not yet processed
+        self.queued = set()
+        self.queued_lock = threading.Lock()
+        self.source = None
+        self.threads = []
+
+    def open_source(self):
+        if self.use_inotify:
+            try:
+                return InotifySource(self.directories)
+            except OSError as e:
+                self.log(f"inotify unavailable ({e}); polling every {self.poll_interval}s")
+        return PollingSource(self.directories, self.poll_interval)
+
+    @property
+    def mode(self):
+        return "inotify" if isinstance(self.source, InotifySource) else "polling"
+
+    def log(self, message):
+        next(iter(self.engines.values())).log_message(message)
+
+    def start(self):
+        for directory, engine in self.engines.items():
+            engine.begin_run(directory, self.results[directory])
+        self.source = self.open_source()
+        self.rescan()
+        self.threads = [threading.Thread(target=self.watch_loop, name="watch", daemon=True),
+                        threading.Thread(target=self.move_loop, name="move", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+        self.log(f"Watching {len(self.directories)} directories ({self.mode})")
+
+    def stop(self):
+        """Stop watching, finish queued moves and close the run journals"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+        for directory, engine in self.engines.items():
+            engine.end_run(self.results[directory])
+
+    def run(self):
+        """Watch until :meth:`stop` is called from another thread"""
+        self.start()
+        try:
+            # Wait in ticks: on Windows Ctrl+C cannot interrupt a wait without a timeout
+            while not self.stop_event.wait(TICK_SECONDS):
+                pass
+        finally:
+            self.stop()
+
+    def rescan(self):
+        """Treat every file currently in the directories as newly arrived"""
+        for directory in self.directories:
+            try:
+                for _, entry in FileUtils.scan_entries(directory):
+                    self.seen(directory, entry.name)
+            except OSError as e:
+                self.log(f"Could not scan {directory}: {str(e)}")
+
+    def seen(self, directory, filename):
+        """Start (or restart) the quiet period for a matching file.
+
+        Files already waiting for the mover are left alone, so a late
+        event cannot queue the same file twice.
+        """
+        path = os.path.join(directory, filename)
+        item = self.pending.get(path)
+        if item is not None:
+            item[4] = time.monotonic()
+            return
+        with self.queued_lock:
+            if path in self.queued:
+                return
+        engine = self.engines[directory]
+        match = self.matcher.match(engine.normalize_filename(filename))
+        if match is None:
+            return
+        self.pending[path] = [directory, filename, match, None, time.monotonic()]
+
+    def settled(self):
+        """Yield pending files whose size and mtime have been stable long enough.
+
+        A yielded file counts as queued until :meth:`process` has handled it.
+        """
+        now = time.monotonic()
+        for path, item in list(self.pending.items()):
+            try:
+                key = FileUtils.file_key(os.stat(path))
+            except OSError:
+                del self.pending[path]
+                continue
+            if key != item[3]:
+                item[3] = key
+                item[4] = now
+            elif now - item[4] >= self.debounce:
+                del self.pending[path]
+                with self.queued_lock:
+                    self.queued.add(path)
+                yield item[:3]
+
+    def watch_loop(self):
+        while not self.stop_event.is_set():
+            events = self.source.poll(TICK_SECONDS)
+            if events is None:
+                self.log("Watch queue overflowed; rescanning")
+                self.rescan()
+            else:
+                for directory, filename in events:
+                    self.seen(directory, filename)
+
+            for item in self.settled():
+                # Blocks while the queue is full, which holds back the watcher
+                while not self.stop_event.is_set():
+                    try:
+                        self.queue.put(item, timeout=TICK_SECONDS)
+                        break
+                    except queue.Full:
+                        continue
+
+    def move_loop(self):
+        while not (self.stop_event.is_set() and self.queue.empty()):
+            try:
+                directory, filename, match = self.queue.get(timeout=TICK_SECONDS)
+            except queue.Empty:
+                continue
+            self.process(directory, filename, match)
+            self.queue.task_done()
+
+    def process(self, directory, filename, match):
+        engine = self.engines[directory]
+        result = self.results[directory]
+        result.scanned += 1
+        result.add_match(match.name)
+        try:
+            outcome = engine.process_single_file(directory, filename, match.pattern, match)
+            engine.record_outcome(result, filename, outcome)
+        except Exception as e:
+            engine.record_outcome(result, filename, error=e)
+        finally:
+            with self.queued_lock:
+                self.queued.discard(os.path.join(directory, filename))
+
+    def summary(self):
+        return [result.to_dict() for result in self.results.values()]
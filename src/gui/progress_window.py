@@ -1,36 +1,103 @@
+import threading
+from collections import deque
 import tkinter as tk
 from tkinter import ttk
 
+# Progress and log updates are applied at most this often (10 repaints/second)
+POLL_INTERVAL_MS = 100
+
+# Log lines kept in the GUI log view; older lines are dropped
+MAX_LOG_LINES = 1000
+
+# Animation step of the progress bar while the total is unknown
+INDETERMINATE_STEP_MS = 50
+
+class ProgressRelay:
+    """Thread-safe hand-off of progress and log lines from a worker to Tk.
+
+    Worker threads call report() and log() and never touch Tk. The Tk
+    thread calls drain() on a timer: progress coalesces to the latest
+    value and pending log lines are kept in a bounded ring buffer, so a
+    fast worker cannot flood the UI.
+    """
+
+    def __init__(self, max_lines=MAX_LOG_LINES):
+        self.lock = threading.Lock()
+        self.progress = None
+        self.messages = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.cancel_event = threading.Event()
+        self.finished = threading.Event()
+
+    def report(self, current, total, status):
+        with self.lock:
+            self.progress = (current, total, status)
+
+    def log(self, message):
+        with self.lock:
+            if len(self.messages) == self.messages.maxlen:
+                self.dropped += 1
+            self.messages.append(message)
+
+    def finish(self):
+        self.finished.set()
+
+    def drain(self):
+        """Return ``(progress, messages, dropped)`` accumulated since the last drain"""
+        with self.lock:
+            progress, self.progress = self.progress, None
+            messages = list(self.messages)
+            self.messages.clear()
+            dropped, self.dropped = self.dropped, 0
+        return progress, messages, dropped
+
 class ProgressWindow:
-    def __init__(self, parent, total_files):
+    def __init__(self, parent, total_files, cancel_event=None):
         self.window = tk.Toplevel(parent)
         self.window.title("Processing Files")
         self.window.geometry("400x150")
         self.window.transient(parent)
         self.window.grab_set()
         
-        # Progress bar
+        # Progress bar; it runs in indeterminate mode until the total is known
         self.progress_var = tk.DoubleVar()
         self.progress_bar = ttk.Progressbar(
             self.window, 
             variable=self.progress_var,
-            maximum=total_files
+            maximum=total_files or 1,
+            mode='determinate' if total_files else 'indeterminate'
         )
         self.progress_bar.grid(row=0, column=0, columnspan=2, padx=10, pady=10, sticky=(tk.W, tk.E))
+        if not total_files:
+            self.progress_bar.start(INDETERMINATE_STEP_MS)
         
         # Status label
         self.status_var = tk.StringVar(value="Processing files...")
         ttk.Label(self.window, textvariable=self.status_var).grid(row=1, column=0, columnspan=2, pady=5)
         
-        # Cancel button
+        # Cancel button; the event lets worker threads see cancellation without Tk
         self.cancel_var = tk.BooleanVar(value=False)
+        self.cancel_event = cancel_event or threading.Event()
         ttk.Button(self.window, text="Cancel", command=self.cancel).grid(row=2, column=0, columnspan=2, pady=10)
         
     def update(self, current, total, status):
-        self.progress_var.set(current)
+        """Show progress; call from the Tk thread only.
+
+        ``total`` may be an estimate that changes between updates, or
+        None while it is still unknown; the bar then keeps moving back and
+        forth and switches to showing ``current`` once a total arrives.
+        """
+        if not total:
+            self.status_var.set(f"{status} ({current})")
+            return
+        if str(self.progress_bar.cget('mode')) == 'indeterminate':
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode='determinate')
+        self.progress_bar.configure(maximum=max(total, current))
         self.status_var.set(f"{status} ({current}/{total})")
-        self.window.update()
+        self.progress_var.set(current)
         
     def cancel(self):
         self.cancel_var.set(True)
-        self.window.destroy() 
\ No newline at end of file
+        self.cancel_event.set()
+        self.window.destroy()
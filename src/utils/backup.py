@@ -0,0 +1,102 @@
+import os
+import errno
+import shutil
+import threading
+
+from utils.file_utils import DirectoryCache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl request for a copy-on-write clone (Linux: btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+# Folder created inside the organized directory when no backup root is given
+BACKUP_DIR_NAME = ".backups"
+
+BACKUP_METHODS = ("reflink", "hardlink", "copy")
+
+# Errors meaning "this method is not available here", not "this file failed"
+UNSUPPORTED_ERRORS = {errno.EXDEV, errno.EINVAL, errno.EPERM, errno.ENOTTY,
+                      errno.EOPNOTSUPP, errno.ENOSYS, errno.EMLINK}
+if hasattr(errno, "ENOTSUP"):
+    UNSUPPORTED_ERRORS.add(errno.ENOTSUP)
+
+
+class BackupManager:
+    """Backs files up into a separate backup root before they are moved.
+
+    Each backup tries the cheapest method first:
+
+    - ``reflink``: a copy-on-write clone, no data is copied
+    - ``hardlink``: a second name for the file, made before it is renamed
+    - ``copy``: a full copy, the last resort
+
+    A method that the filesystem does not support is disabled for the
+    rest of the run, so it costs at most one failed syscall. Backups
+    keep the file's path relative to ``source_root``.
+    """
+
+    def __init__(self, backup_root, source_root, method="auto"):
+        self.backup_root = backup_root
+        self.source_root = source_root
+        if method == "auto":
+            methods = list(BACKUP_METHODS)
+        elif method in BACKUP_METHODS:
+            methods = [method]
+        else:
+            raise ValueError(f"Unknown backup method '{method}'")
+        if fcntl is None and "reflink" in methods and len(methods) > 1:
+            methods.remove("reflink")
+        self.methods = methods
+        self.lock = threading.Lock()
+        self.created_dirs = DirectoryCache()
+
+    def backup_path_for(self, file_path):
+        relative_path = os.path.relpath(file_path, self.source_root)
+        return os.path.join(self.backup_root, relative_path)
+
+    def create_backup(self, file_path):
+        """Back up one file; returns ``(backup_path, method)``"""
+        backup_path = self.backup_path_for(file_path)
+        self.created_dirs.ensure(os.path.dirname(backup_path))
+
+        for method in list(self.methods):
+            try:
+                getattr(self, method)(file_path, backup_path)
+                return backup_path, method
+            except OSError as e:
+                if method == "copy" or e.errno not in UNSUPPORTED_ERRORS:
+                    raise
+                self.disable(method)
+        raise OSError(errno.ENOTSUP, "No backup method available", file_path)
+
+    def disable(self, method):
+        with self.lock:
+            if method in self.methods and len(self.methods) > 1:
+                self.methods.remove(method)
+
+    @staticmethod
+    def reflink(src, dst):
+        if fcntl is None:
+            raise OSError(errno.ENOTSUP, "Reflinks are not supported on this platform")
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+        shutil.copystat(src, dst)
+
+    @staticmethod
+    def hardlink(src, dst):
+        if os.path.lexists(dst):
+            os.remove(dst)
+        os.link(src, dst)
+
+    @staticmethod
+    def copy(src, dst):
+        shutil.copy2(src, dst)
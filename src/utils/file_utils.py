@@ -1,9 +1,142 @@
 import os
+import json
+import errno
 import shutil
+import threading
+import uuid
+from collections import OrderedDict
 from pathlib import Path
 import re
 from datetime import datetime
 
+# Hidden folder inside an organized directory for run journals and other state
+STATE_DIR_NAME = ".organizer"
+
+# Chunk size for cross-device copies
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Default number of directories remembered by a DirectoryCache
+DIR_CACHE_SIZE = 4096
+
+# Error categories reported by FileUtils.move
+MOVE_ERROR_CATEGORIES = {
+    errno.ENOENT: "not_found",
+    errno.EACCES: "permission",
+    errno.EPERM: "permission",
+    errno.EEXIST: "exists",
+    errno.ENOTEMPTY: "exists",
+    errno.EISDIR: "exists",
+    errno.ENOSPC: "no_space",
+    errno.ENAMETOOLONG: "invalid_name",
+    errno.EINVAL: "invalid_name",
+    errno.EROFS: "read_only",
+}
+if hasattr(errno, "EDQUOT"):
+    MOVE_ERROR_CATEGORIES[errno.EDQUOT] = "no_space"
+
+class MoveResult:
+    """Outcome of FileUtils.move; truthy when the file was moved"""
+    __slots__ = ('ok', 'method', 'category', 'error')
+
+    def __init__(self, ok, method=None, category=None, error=None):
+        self.ok = ok
+        self.method = method
+        self.category = category
+        self.error = error
+
+    def __bool__(self):
+        return self.ok
+
+    def __str__(self):
+        if self.ok:
+            return f"moved ({self.method})"
+        return f"{self.category}: {self.error}"
+
+class MoveError(Exception):
+    """Raised by callers that need a failed move to propagate"""
+
+    def __init__(self, result):
+        self.category = result.category
+        super().__init__(f"Failed to move file ({result.category}): {result.error}")
+
+def categorize_error(error):
+    """Map an OSError to a short, stable category name"""
+    if getattr(error, "winerror", None) == 32:
+        return "in_use"
+    return MOVE_ERROR_CATEGORIES.get(getattr(error, "errno", None), "io_error")
+
+class DirectoryCache:
+    """Bounded LRU set of directories known to exist.
+
+    ``ensure`` creates a directory on first use and afterwards answers
+    from memory, so a run touching the same target folder thousands of
+    times makes one ``makedirs`` call for it. When more than ``maxsize``
+    directories are known the least recently used is forgotten (and
+    simply checked again if it comes back). Callers that find a cached
+    directory gone, e.g. deleted mid-run, ``discard`` it and retry.
+    Safe to share between threads; concurrent callers for the same new
+    directory wait for a single creation.
+    """
+
+    def __init__(self, maxsize=DIR_CACHE_SIZE, create=None):
+        self.maxsize = maxsize
+        self.create = create or FileUtils.ensure_directory
+        self.entries = OrderedDict()
+        self.creating = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, path):
+        with self.lock:
+            return path in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, path):
+        """Remember ``path`` as existing without touching the disk"""
+        with self.lock:
+            self.add_locked(path)
+
+    def add_locked(self, path):
+        self.entries[path] = True
+        self.entries.move_to_end(path)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def discard(self, path):
+        with self.lock:
+            self.entries.pop(path, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def ensure(self, path):
+        """Make sure ``path`` exists; returns True if it had to be checked on disk"""
+        with self.lock:
+            if path in self.entries:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return False
+            creating = self.creating.setdefault(path, threading.Lock())
+
+        with creating:
+            with self.lock:
+                if path in self.entries:
+                    self.hits += 1
+                    return False
+            try:
+                self.create(path)
+                with self.lock:
+                    self.add_locked(path)
+                    self.misses += 1
+            finally:
+                with self.lock:
+                    self.creating.pop(path, None)
+        return True
+
 class FileUtils:
     @staticmethod
     def get_file_year(file_path):
@@ -34,17 +167,135 @@ class FileUtils:
     @staticmethod
     def move_file(src, dst):
         """Move a file with proper error handling"""
+        return bool(FileUtils.move(src, dst))
+        
+    @staticmethod
+    def move(src, dst, same_device=True, overwrite=False):
+        """Move a file, returning a MoveResult instead of raising.
+
+        On the same device this is a single os.rename (os.replace with
+        ``overwrite``, which also replaces an existing target on Windows).
+        Cross-device moves (``same_device=False``, or a rename that fails
+        with EXDEV) fall back to a chunked copy to a temporary name, a
+        rename into place and an unlink of the source; without
+        ``overwrite`` an existing target is left alone there too.
+        """
+        if same_device:
+            try:
+                (os.replace if overwrite else os.rename)(src, dst)
+                return MoveResult(True, "rename")
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    return MoveResult(False, "rename", categorize_error(e), str(e))
+
+        try:
+            FileUtils.copy_file(src, dst, overwrite=overwrite)
+        except OSError as e:
+            return MoveResult(False, "copy", categorize_error(e), str(e))
         try:
-            shutil.move(src, dst)
-            return True
-        except Exception as e:
+            os.unlink(src)
+        except OSError as e:
+            return MoveResult(False, "copy", "source_not_removed", str(e))
+        return MoveResult(True, "copy")
+        
+    @staticmethod
+    def copy_file(src, dst, chunk_size=COPY_CHUNK_SIZE, overwrite=True):
+        """Copy a file in chunks via a temporary name, preserving metadata.
+
+        Without ``overwrite`` an existing ``dst`` raises FileExistsError,
+        as os.rename does on Windows, instead of being replaced.
+        """
+        if not overwrite and os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+        temp_path = f"{dst}.partial"
+        try:
+            with open(src, 'rb') as fsrc, open(temp_path, 'wb') as fdst:
+                shutil.copyfileobj(fsrc, fdst, chunk_size)
+            shutil.copystat(src, temp_path)
+            if overwrite:
+                os.replace(temp_path, dst)
+            else:
+                FileUtils.rename_new(temp_path, dst)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+            
+    @staticmethod
+    def rename_new(src, dst):
+        """Rename ``src`` to ``dst``, raising FileExistsError if ``dst`` exists"""
+        if os.name == 'nt':
+            # os.rename never replaces an existing file on Windows
+            os.rename(src, dst)
+            return
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            raise
+        except OSError:
+            # No hard links on this filesystem (FAT, some SMB shares)
+            if os.path.lexists(dst):
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+            os.rename(src, dst)
+            return
+        os.unlink(src)
+
+    @staticmethod
+    def same_content(path_a, path_b, chunk_size=COPY_CHUNK_SIZE):
+        """Compare two files byte for byte, reading both in chunks"""
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
             return False
+        with open(path_a, 'rb') as file_a, open(path_b, 'rb') as file_b:
+            while True:
+                chunk = file_a.read(chunk_size)
+                if chunk != file_b.read(chunk_size):
+                    return False
+                if not chunk:
+                    return True
             
     @staticmethod
     def ensure_directory(path):
         """Ensure directory exists, create if it doesn't"""
         os.makedirs(path, exist_ok=True)
         
+    @staticmethod
+    def scan_entries(directory, recursive=False, exclude=()):
+        """Lazily yield (relative_path, os.DirEntry) for files in a directory.
+
+        Uses os.scandir so the file type comes from the directory entry
+        instead of an extra stat per file. With ``recursive`` set, nested
+        folders are scanned too, except top-level folders named in ``exclude``.
+        """
+        pending = ['']
+        while pending:
+            relative_dir = pending.pop()
+            path = os.path.join(directory, relative_dir) if relative_dir else directory
+            subdirs = []
+            try:
+                entries = os.scandir(path)
+            except OSError:
+                if not relative_dir:
+                    raise
+                continue
+            with entries:
+                for entry in entries:
+                    relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+                    try:
+                        if entry.is_file():
+                            yield relative_path, entry
+                        elif recursive and entry.is_dir(follow_symlinks=False):
+                            if relative_dir or entry.name not in exclude:
+                                subdirs.append(relative_path)
+                    except OSError:
+                        continue
+            pending.extend(reversed(subdirs))
+
+    @staticmethod
+    def scan_files(directory, recursive=False, exclude=()):
+        """Lazily yield (relative_path, filename) for files in a directory"""
+        for relative_path, entry in FileUtils.scan_entries(directory, recursive, exclude):
+            yield relative_path, entry.name
+            
     @staticmethod
     def get_file_info(file_path):
         """Get file information including size and modification time"""
@@ -54,6 +305,49 @@ class FileUtils:
             'mtime': datetime.fromtimestamp(stat.st_mtime),
             'ctime': datetime.fromtimestamp(stat.st_ctime)
         }
+
+    @staticmethod
+    def file_key(stat):
+        """Identity of a file's contents for change detection: (size, mtime in ns)"""
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def open_replacement(path):
+        """Create a temporary file next to ``path`` to be renamed over it.
+
+        Returns ``(fd, temp_path)``. Unlike ``mkstemp``, which makes the
+        file readable only by its owner, the file is created like a plain
+        ``open`` would (0666 less the umask) and then given the mode of
+        the file it replaces, if there is one.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        temp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:12]}.tmp")
+        fd = os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        except BaseException:
+            os.close(fd)
+            os.remove(temp_path)
+            raise
+        return fd, temp_path
+
+    @staticmethod
+    def write_json_atomic(path, data):
+        """Write JSON to a temporary file, fsync it and rename it over ``path``"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fd, temp_path = FileUtils.open_replacement(path)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
         
     @staticmethod
     def is_valid_filename(filename):
@@ -1,33 +1,197 @@
 import logging
+import logging.handlers
 import os
+import json
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
 
+LOGGER_NAME = 'CaseFileOrganizer'
+LOG_DIR = 'logs'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Buffered handlers flush at most this often (and always on shutdown)
+FLUSH_INTERVAL = 1.0
+
+# Structured log rotation defaults: five 10 MB files
+NDJSON_MAX_BYTES = 10 * 1024 * 1024
+NDJSON_BACKUP_COUNT = 5
+
+# Serializes setup of the queue, listener and handlers in _backend
+_setup_lock = threading.Lock()
+_backend = {}
+
+
+def get_backend():
+    """Queue, listener and handlers shared by every Logger in the process"""
+    return _backend
+
+
+class BufferedFlushMixin:
+    """Leaves lines in the stream buffer between periodic flushes"""
+
+    def __init__(self, *args, flush_interval=FLUSH_INTERVAL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.force_flush()
+
+    def force_flush(self):
+        self.last_flush = time.monotonic()
+        super().flush()
+
+    def close(self):
+        self.acquire()
+        try:
+            if self.stream:
+                self.force_flush()
+        finally:
+            self.release()
+        super().close()
+
+
+class BufferedFileHandler(BufferedFlushMixin, logging.FileHandler):
+    """Plain log file handler with periodic flushing"""
+
+
+class BufferedRotatingFileHandler(BufferedFlushMixin, logging.handlers.RotatingFileHandler):
+    """Size-rotated file handler with periodic flushing"""
+
+
+class NdjsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed via ``extra`` are kept"""
+
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in self.RESERVED:
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
 class Logger:
-    def __init__(self, log_level=logging.INFO):
-        self.logger = logging.getLogger('CaseFileOrganizer')
+    """Application logging through a queue, so callers never wait on file I/O.
+
+    The first instance attaches a single QueueHandler to the
+    ``CaseFileOrganizer`` logger and starts a QueueListener thread that
+    writes to the console, the timestamped log file in ``log_dir``
+    (None for console only) and, with ``structured=True``, a
+    size-rotated NDJSON file. Later instances reuse that setup, only
+    changing the level or adding a missing file, so handlers are never
+    attached twice. Pending records are written out at exit, or on
+    :meth:`flush`.
+    """
+
+    def __init__(self, log_level=logging.INFO, log_dir=LOG_DIR, structured=False,
+                 max_bytes=NDJSON_MAX_BYTES, backup_count=NDJSON_BACKUP_COUNT):
+        self.logger = logging.getLogger(LOGGER_NAME)
         self.logger.setLevel(log_level)
-        
+        with _setup_lock:
+            backend = get_backend()
+            if not backend:
+                self.start_backend()
+            if log_dir and 'file' not in backend:
+                self.add_file_handler(log_dir)
+            if log_dir and structured and 'ndjson' not in backend:
+                self.add_ndjson_handler(log_dir, max_bytes, backup_count)
+
+    def start_backend(self):
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        log_queue = queue.Queue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        listener = logging.handlers.QueueListener(log_queue, console_handler,
+                                                  respect_handler_level=True)
+        listener.start()
+        self.logger.addHandler(queue_handler)
+        get_backend().update(queue=log_queue, queue_handler=queue_handler, listener=listener)
+
+    def add_handler(self, name, handler):
+        """Attach a handler to the running listener"""
+        backend = get_backend()
+        listener = backend['listener']
+        listener.stop()
+        listener.handlers = listener.handlers + (handler,)
+        listener.start()
+        backend[name] = handler
+
+    def add_file_handler(self, log_dir):
         # Create logs directory if it doesn't exist
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
-            
-        # Create file handler
+        os.makedirs(log_dir, exist_ok=True)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        file_handler = logging.FileHandler(f'logs/organizer_{timestamp}.log')
-        file_handler.setLevel(log_level)
-        
-        # Create console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(log_level)
-        
-        # Create formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-        
-        # Add handlers to logger
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        
+        handler = BufferedFileHandler(os.path.join(log_dir, f'organizer_{timestamp}.log'))
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.add_handler('file', handler)
+
+    def add_ndjson_handler(self, log_dir, max_bytes, backup_count):
+        os.makedirs(log_dir, exist_ok=True)
+        handler = BufferedRotatingFileHandler(os.path.join(log_dir, 'organizer.ndjson'),
+                                              maxBytes=max_bytes, backupCount=backup_count,
+                                              encoding='utf-8')
+        handler.setFormatter(NdjsonFormatter())
+        self.add_handler('ndjson', handler)
+
     def get_logger(self):
-        return self.logger 
\ No newline at end of file
+        return self.logger
+
+    @property
+    def handlers(self):
+        """Handlers the background listener writes to"""
+        return get_backend()['listener'].handlers
+
+    @staticmethod
+    def flush():
+        """Wait until every queued record has been written and flushed"""
+        backend = get_backend()
+        if backend:
+            backend['queue'].join()
+            for handler in backend['listener'].handlers:
+                getattr(handler, 'force_flush', handler.flush)()
+
+    @staticmethod
+    def detach():
+        """Drop the logging setup a forked process inherited from its parent.
+
+        The child gets copies of the parent's QueueHandler and queue but
+        not the listener thread, so its records would pile up unwritten.
+        Unlike :meth:`shutdown` this neither stops nor flushes anything:
+        the listener and any buffered records belong to the parent, and
+        writing the buffer copies out would duplicate them.
+        """
+        global _setup_lock
+        # The lock may have been held by another thread at fork time
+        _setup_lock = threading.Lock()
+        backend = get_backend()
+        if backend:
+            logging.getLogger(LOGGER_NAME).removeHandler(backend['queue_handler'])
+            backend.clear()
+
+    @staticmethod
+    def shutdown():
+        """Stop the listener thread after writing out pending records"""
+        with _setup_lock:
+            backend = get_backend()
+            if not backend:
+                return
+            backend['listener'].stop()
+            logging.getLogger(LOGGER_NAME).removeHandler(backend['queue_handler'])
+            for handler in backend['listener'].handlers:
+                handler.close()
+            backend.clear()
+
+
+atexit.register(Logger.shutdown)
@@ -0,0 +1,128 @@
+import math
+import time
+import threading
+
+from utils.file_utils import FileUtils
+
+# Latency buckets grow by 2**(1/8) (about 9%) starting at one microsecond
+BUCKET_BASE = 1e-6
+BUCKETS_PER_DOUBLING = 8
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Latency histogram with logarithmic buckets and constant memory"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds <= BUCKET_BASE:
+            index = 0
+        else:
+            index = int(math.log2(seconds / BUCKET_BASE) * BUCKETS_PER_DOUBLING) + 1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent):
+        """Upper bound of the bucket holding the given percentile, in seconds"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(BUCKET_BASE * 2 ** (index / BUCKETS_PER_DOUBLING), self.max)
+        return self.max
+
+    def to_dict(self):
+        stats = {'count': self.count, 'total_s': round(self.total, 6)}
+        for percent in PERCENTILES:
+            stats[f'p{percent}_ms'] = round(self.percentile(percent) * 1000, 4)
+        stats['max_ms'] = round(self.max * 1000, 4)
+        return stats
+
+
+class RunMetrics:
+    """Per-stage latency histograms and counters for one run.
+
+    Callers time a stage with ``start = metrics.clock()`` followed by
+    ``metrics.record(stage, start)`` and count events with ``add``.
+    Safe to use from worker threads. With ``live_path`` set the current
+    report is rewritten there at most every ``live_interval`` seconds.
+    """
+
+    enabled = True
+
+    def __init__(self, live_path=None, live_interval=1.0):
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.live_path = live_path
+        self.live_interval = live_interval
+        self.last_live = 0.0
+
+    clock = staticmethod(time.perf_counter)
+
+    def record(self, stage, start):
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.record(elapsed)
+
+    def add(self, counter, amount=1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def report(self):
+        with self.lock:
+            return {
+                'elapsed_s': round(time.time() - self.started, 3),
+                'stages': {name: h.to_dict() for name, h in sorted(self.stages.items())},
+                'counters': dict(sorted(self.counters.items()))
+            }
+
+    def write_live(self, force=False):
+        """Rewrite the live metrics file if it is due (or ``force`` is set)"""
+        if not self.live_path:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_live < self.live_interval:
+            return
+        self.last_live = now
+        FileUtils.write_json_atomic(self.live_path, self.report())
+
+
+class NullMetrics:
+    """Stand-in used when metrics are off; every call is a no-op"""
+
+    enabled = False
+
+    @staticmethod
+    def clock():
+        return 0.0
+
+    def record(self, stage, start):
+        pass
+
+    def add(self, counter, amount=1):
+        pass
+
+    def report(self):
+        return None
+
+    def write_live(self, force=False):
+        pass
+
+
+NULL_METRICS = NullMetrics()
@@ -90,9 +90,12 @@ class TestCaseFileOrganizer(unittest.TestCase):
         # Wait for processing to complete
         self.app.processing_thread.join()
         
-        # Check for backup files
-        backup_files = [f for f in os.listdir(self.test_dir) if f.endswith('.bak')]
+        # Check for backup files in the backup folder, not the intake folder
+        backup_files = []
+        for root, _, files in os.walk(os.path.join(self.test_dir, ".backups")):
+            backup_files.extend(files)
         self.assertEqual(len(backup_files), 2)  # Only ACC files
+        self.assertFalse(any(f.endswith('.bak') for f in os.listdir(self.test_dir)))
         
     def test_year_organization(self):
         # Set up test conditions
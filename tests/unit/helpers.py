@@ -0,0 +1,19 @@
+"""Shared fixtures for the unit tests.
+
+Importing this module puts src on ``sys.path``. Tests then import the
+code under test the way it imports itself (``core.*``, ``utils.*``), so
+every module is loaded only once; import it before anything from src.
+"""
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+ACC_PATTERN = {
+    "regex": r"ACC(\d+)\.(\d{2})",
+    "folder_format": "ACC/{year}/ACC{number}.{year}",
+    "description": "Accident case files (format: ACC134.23)",
+    "sort_by": ["number", "year"]
+}
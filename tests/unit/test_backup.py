@@ -0,0 +1,62 @@
+import unittest
+import os
+import errno
+import shutil
+import tempfile
+from unittest import mock
+
+import helpers  # noqa: F401 (puts src on sys.path)
+from utils.backup import BackupManager
+
+class TestBackupManager(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.test_dir, "intake")
+        self.backup_root = os.path.join(self.test_dir, "backups")
+        os.makedirs(os.path.join(self.source, "nested"))
+        self.file_path = os.path.join(self.source, "nested", "ACC1.23.pdf")
+        with open(self.file_path, 'w') as f:
+            f.write("test content")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_backup_keeps_relative_path(self):
+        manager = BackupManager(self.backup_root, self.source)
+        backup_path, method = manager.create_backup(self.file_path)
+
+        self.assertEqual(backup_path, os.path.join(self.backup_root, "nested", "ACC1.23.pdf"))
+        self.assertIn(method, ("reflink", "hardlink", "copy"))
+        with open(backup_path) as f:
+            self.assertEqual(f.read(), "test content")
+
+    def test_hardlink_survives_move(self):
+        manager = BackupManager(self.backup_root, self.source, method="hardlink")
+        backup_path, method = manager.create_backup(self.file_path)
+        os.rename(self.file_path, os.path.join(self.source, "moved.pdf"))
+
+        self.assertEqual(method, "hardlink")
+        with open(backup_path) as f:
+            self.assertEqual(f.read(), "test content")
+
+    def test_unsupported_method_is_disabled(self):
+        manager = BackupManager(self.backup_root, self.source)
+        unsupported = OSError(errno.EOPNOTSUPP, "Operation not supported")
+        with mock.patch.object(BackupManager, "reflink", side_effect=unsupported), \
+             mock.patch.object(BackupManager, "hardlink", side_effect=OSError(errno.EXDEV, "cross-device")):
+            backup_path, method = manager.create_backup(self.file_path)
+
+        self.assertEqual(method, "copy")
+        self.assertEqual(manager.methods, ["copy"])
+
+    def test_real_errors_propagate(self):
+        manager = BackupManager(self.backup_root, self.source)
+        with self.assertRaises(OSError):
+            manager.create_backup(os.path.join(self.source, "missing.pdf"))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            BackupManager(self.backup_root, self.source, method="tape")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+from helpers import SRC_DIR
+sys.path.insert(0, os.path.dirname(SRC_DIR))
+
+from benchmarks.run_benchmarks import run_case
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_run_case(self):
+        case = run_case(self.root, 300)
+
+        self.assertEqual([s['stage'] for s in case['stages']],
+                         ['generate', 'scan', 'classify', 'classify_batch', 'plan', 'move',
+                          'rescan', 'incremental_cold', 'incremental_warm'])
+        self.assertEqual(case['moved'], case['matched'])
+        self.assertGreater(case['matched'], 0)
+        self.assertEqual(os.listdir(self.root), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import io
+import os
+import json
+import shutil
+import tempfile
+
+import helpers  # noqa: F401 (puts src on sys.path)
+from cli import main
+
+CONFIG = {
+    "patterns": {
+        "ACC": {
+            "regex": r"ACC(\d+)\.(\d{2})",
+            "folder_format": "ACC/{year}/ACC{number}.{year}",
+            "description": "Accident case files (format: ACC134.23)",
+            "sort_by": ["number", "year"]
+        },
+        "HRER": {
+            "regex": r"HRER(\d+)\.(\d{2})",
+            "folder_format": "HRER/{year}/HRER{number}.{year}",
+            "description": "Human rights enforcement report files (format: HRER134.23)",
+            "sort_by": ["number", "year"]
+        }
+    },
+    "settings": {
+        "create_year_folders": True,
+        "sort_by_year": True,
+        "backup_before_move": False
+    }
+}
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.test_dir = os.path.join(self.work_dir, "intake")
+        os.makedirs(self.test_dir)
+        self.config_file = os.path.join(self.work_dir, "file_patterns.json")
+        with open(self.config_file, 'w') as f:
+            json.dump(CONFIG, f)
+        for filename in ["ACC134.23.pdf", "HRER1.22.pdf", "notes.txt"]:
+            with open(os.path.join(self.test_dir, filename), 'w') as f:
+                f.write("test content")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def run_cli(self, *args):
+        stream = io.StringIO()
+        code = main([self.test_dir, "--config", self.config_file] + list(args), stream=stream)
+        return code, stream.getvalue()
+
+    def test_json_summary(self):
+        code, output = self.run_cli("-p", "ACC", "-p", "HRER")
+        report = json.loads(output)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(report['summary']['moved'], 2)
+        self.assertEqual(report['runs'][0]['matched_by_pattern'], {'ACC': 1, 'HRER': 1})
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.test_dir, "HRER", "2022", "HRER1.2022", "HRER1.22.pdf")))
+
+    def test_ndjson_summary(self):
+        code, output = self.run_cli("-p", "ACC", "--format", "ndjson", "--backup")
+        records = [json.loads(line) for line in output.splitlines()]
+
+        self.assertEqual(code, 0)
+        self.assertEqual([r['type'] for r in records], ['run', 'summary'])
+        self.assertEqual(records[-1]['backups'], 1)
+
+    def test_all_patterns(self):
+        code, output = self.run_cli("--all")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(output)['summary']['moved'], 2)
+
+    def test_dry_run(self):
+        code, output = self.run_cli("--all", "--dry-run", "--format", "ndjson")
+        records = [json.loads(line) for line in output.splitlines()]
+
+        self.assertEqual(code, 0)
+        self.assertEqual([r['type'] for r in records], ['move', 'move', 'summary'])
+        self.assertEqual(records[-1]['directories'], 2)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ["ACC134.23.pdf", "HRER1.22.pdf", "notes.txt"])
+
+    def test_unknown_pattern(self):
+        code, output = self.run_cli("-p", "MISSING")
+
+        self.assertEqual(code, 2)
+        self.assertEqual(output, "")
+
+    def test_undo(self):
+        code, output = self.run_cli("--all")
+        run_id = json.loads(output)['runs'][0]['run_id']
+
+        stream = io.StringIO()
+        code = main(["undo", self.test_dir, run_id], stream=stream)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(stream.getvalue())['restored'], 2)
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "HRER1.22.pdf")))
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "HRER")))
+
+    def test_undo_from_another_working_directory(self):
+        cwd = os.getcwd()
+        try:
+            os.chdir(self.work_dir)
+            stream = io.StringIO()
+            main(["intake", "--config", self.config_file, "--all", "--backup"], stream=stream)
+            run_id = json.loads(stream.getvalue())['runs'][0]['run_id']
+            # One organized file is gone, so it has to come from its backup
+            shutil.rmtree(os.path.join(self.test_dir, "HRER"))
+            os.chdir(tempfile.gettempdir())
+
+            stream = io.StringIO()
+            code = main(["undo", self.test_dir, run_id], stream=stream)
+        finally:
+            os.chdir(cwd)
+
+        report = json.loads(stream.getvalue())
+        self.assertEqual(code, 0)
+        self.assertEqual((report['restored'], report['from_backup']), (1, 1))
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "HRER1.22.pdf")))
+
+    def test_patterns_import_export(self):
+        export_file = os.path.join(self.work_dir, "catalog.csv")
+        stream = io.StringIO()
+        code = main(["patterns", "--config", self.config_file, "export", export_file], stream=stream)
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(stream.getvalue()), {'exported': 2})
+
+        with open(export_file, 'a') as f:
+            f.write("BROKEN,BROKEN(,BROKEN/{number},,\n")
+        stream = io.StringIO()
+        code = main(["patterns", "--config", self.config_file, "import", export_file], stream=stream)
+        self.assertEqual(code, 1)
+        self.assertEqual(json.loads(stream.getvalue())['errors'][0]['pattern'], "BROKEN")
+
+if __name__ == '__main__':
+    unittest.main()
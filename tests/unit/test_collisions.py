@@ -0,0 +1,87 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import helpers  # noqa: F401 (puts src on sys.path)
+from core.collisions import TargetNameIndex, suffixed_name
+
+
+class TestTargetNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for filename in ["ACC134.23.pdf", "ACC134.23 (1).pdf"]:
+            with open(os.path.join(self.test_dir, filename), 'w') as f:
+                f.write("test content")
+        self.index = TargetNameIndex()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_suffixed_name(self):
+        self.assertEqual(suffixed_name("ACC134.23.pdf", 2), "ACC134.23 (2).pdf")
+        self.assertEqual(suffixed_name("README", 1), "README (1)")
+
+    def test_free_name_is_reserved(self):
+        self.assertEqual(self.index.claim(self.test_dir, "ACC135.23.pdf", "skip"),
+                         ("ACC135.23.pdf", "new"))
+        self.assertEqual(self.index.claim(self.test_dir, "ACC135.23.pdf", "skip"),
+                         (None, "skipped"))
+
+    def test_policies(self):
+        self.assertEqual(self.index.claim(self.test_dir, "ACC134.23.pdf", "suffix"),
+                         ("ACC134.23 (2).pdf", "renamed"))
+        self.assertEqual(self.index.claim(self.test_dir, "ACC134.23.pdf", "overwrite"),
+                         ("ACC134.23.pdf", "overwritten"))
+        self.assertEqual(self.index.claim(self.test_dir, "ACC134.23.pdf", "hash"),
+                         ("ACC134.23.pdf", "exists"))
+
+    def test_directory_listed_once(self):
+        for i in range(10):
+            self.index.claim(self.test_dir, f"ACC{i}.23.pdf", "suffix")
+        self.index.claim(os.path.join(self.test_dir, "missing"), "ACC1.23.pdf", "suffix")
+
+        self.assertEqual(self.index.listed, 2)
+
+    def test_release(self):
+        self.index.claim(self.test_dir, "ACC200.23.pdf", "skip")
+        self.index.release(self.test_dir, "ACC200.23.pdf")
+
+        self.assertEqual(self.index.claim(self.test_dir, "ACC200.23.pdf", "skip"),
+                         ("ACC200.23.pdf", "new"))
+
+    def test_bounded(self):
+        index = TargetNameIndex(maxsize=2)
+        for name in ("a", "b", "c"):
+            directory = os.path.join(self.test_dir, name)
+            index.claim(directory, "ACC1.23.pdf", "suffix")
+            index.landed(directory)
+
+        self.assertEqual(len(index.entries), 2)
+        self.assertNotIn(os.path.join(self.test_dir, "a"), index.entries)
+
+    def test_reserved_directory_is_not_evicted(self):
+        index = TargetNameIndex(maxsize=1)
+        first = os.path.join(self.test_dir, "a")
+        index.claim(first, "ACC1.23.pdf", "suffix")
+        index.claim(os.path.join(self.test_dir, "b"), "ACC1.23.pdf", "suffix")
+
+        self.assertIn(first, index.entries)
+        self.assertEqual(index.claim(first, "ACC1.23.pdf", "suffix"), ("ACC1.23 (1).pdf", "renamed"))
+
+    def test_directory_is_listed_without_the_lock(self):
+        held = []
+        list_names = TargetNameIndex.list_names
+
+        def listing(directory):
+            held.append(self.index.lock.locked())
+            return list_names(directory)
+
+        with mock.patch.object(self.index, 'list_names', listing):
+            self.index.claim(self.test_dir, "ACC1.23.pdf", "suffix")
+
+        self.assertEqual(held, [False])
+
+if __name__ == '__main__':
+    unittest.main()
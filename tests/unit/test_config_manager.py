@@ -1 +1,160 @@
- 
\ No newline at end of file
+import unittest
+import os
+import json
+import shutil
+import tempfile
+import helpers  # noqa: F401 (puts src on sys.path)
+from core.config_manager import ConfigManager, CompiledPattern, PatternImportError
+
+class TestConfigManager(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.test_dir, "file_patterns.json")
+        self.config_manager = ConfigManager(self.config_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_default_patterns(self):
+        patterns = self.config_manager.get_all_patterns()
+        self.assertEqual(list(patterns), ["ACC", "HREPN", "HRER"])
+
+    def test_compiled_pattern_is_cached(self):
+        compiled = self.config_manager.get_compiled_pattern("ACC")
+        self.assertIs(self.config_manager.get_compiled_pattern("ACC"), compiled)
+        self.assertEqual(compiled.regex.match("ACC134.23.pdf").groups(), ("134", "23"))
+        self.assertIsNone(self.config_manager.get_compiled_pattern("MISSING"))
+
+    def test_compiled_pattern_is_immutable(self):
+        compiled = self.config_manager.get_compiled_pattern("ACC")
+        with self.assertRaises(AttributeError):
+            compiled.folder_format = "other"
+        with self.assertRaises(TypeError):
+            compiled.data['regex'] = "other"
+
+    def test_update_invalidates_cache(self):
+        compiled = self.config_manager.get_compiled_pattern("ACC")
+        self.config_manager.update_pattern("ACC", {
+            "regex": r"ACC-(\d+)\.(\d{2})",
+            "folder_format": "ACC/{year}",
+            "description": "Updated"
+        })
+        updated = self.config_manager.get_compiled_pattern("ACC")
+        self.assertIsNot(updated, compiled)
+        self.assertEqual(updated.regex.pattern, r"ACC-(\d+)\.(\d{2})")
+
+        self.config_manager.delete_pattern("ACC")
+        self.assertIsNone(self.config_manager.get_compiled_pattern("ACC"))
+        with open(self.config_file) as f:
+            self.assertNotIn("ACC", json.load(f)["patterns"])
+
+    def test_format_folder(self):
+        compiled = self.config_manager.get_compiled_pattern("ACC")
+        self.assertEqual(compiled.format_folder("2023", "134"),
+                         os.path.join("ACC", "2023", "ACC134.2023"))
+        self.assertEqual(compiled.format_folder("2023", "134", create_year_folders=False),
+                         os.path.join("ACC", "ACC134.2023"))
+
+    def test_format_folder_fallback(self):
+        compiled = CompiledPattern("padded", {"regex": r"P(\d+)", "folder_format": "P/{number:>04}"})
+        self.assertIsNone(compiled.template)
+        self.assertEqual(compiled.format_folder("", "7"), os.path.join("P", "0007"))
+
+    def test_save_is_atomic(self):
+        self.config_manager.update_setting('backup_before_move', False)
+        self.assertEqual(os.listdir(self.test_dir), ["file_patterns.json"])
+        self.assertFalse(ConfigManager(self.config_file).get_setting('backup_before_move'))
+
+    def test_batch_writes_once(self):
+        writes = []
+        commit = self.config_manager.commit
+        self.config_manager.commit = lambda: (writes.append(1), commit())
+
+        with self.config_manager.batch():
+            self.config_manager.update_setting('sort_by_year', False)
+            with self.config_manager.batch():
+                for i in range(10):
+                    self.config_manager.update_pattern(f"P{i}", {"regex": rf"P{i}(\d+)", "folder_format": "{number}"})
+            self.assertFalse(os.path.exists(self.config_file))
+
+        self.assertEqual(len(writes), 1)
+        reloaded = ConfigManager(self.config_file)
+        self.assertIn("P9", reloaded.get_all_patterns())
+        self.assertFalse(reloaded.get_setting('sort_by_year'))
+
+    def test_batch_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.config_manager.batch():
+                self.config_manager.delete_pattern("ACC")
+                raise ValueError("abort")
+
+        self.assertIsNotNone(self.config_manager.get_pattern("ACC"))
+        self.assertFalse(os.path.exists(self.config_file))
+
+    @unittest.skipIf(os.name == 'nt', "POSIX permission bits")
+    def test_commit_keeps_file_mode(self):
+        self.config_manager.commit()
+        os.chmod(self.config_file, 0o644)
+        self.config_manager.commit()
+        self.assertEqual(os.stat(self.config_file).st_mode & 0o777, 0o644)
+        self.assertEqual(os.listdir(self.test_dir), ["file_patterns.json"])
+
+    def test_import_patterns(self):
+        patterns = {f"CASE{i}": {"regex": rf"CASE{i}-(\d+)\.(\d{{2}})",
+                                 "folder_format": f"CASE{i}/{{year}}/{{number}}"}
+                    for i in range(100)}
+        self.assertEqual(self.config_manager.import_patterns(patterns), 100)
+
+        reloaded = ConfigManager(self.config_file)
+        self.assertEqual(len(reloaded.get_all_patterns()), 103)
+        self.assertEqual(reloaded.get_pattern("CASE5")["description"], "")
+
+    def test_import_reports_all_errors(self):
+        patterns = {
+            "GOOD": {"regex": r"G(\d+)", "folder_format": "G/{number}"},
+            "BAD_REGEX": {"regex": "B(\\d+", "folder_format": "B/{number}"},
+            "BAD_FORMAT": {"regex": r"F(\d+)", "folder_format": "F/{case}"},
+            "NO_YEAR_GROUP": {"regex": r"Y(\d+)", "folder_format": "Y/{year}/{number}"}
+        }
+        with self.assertRaises(PatternImportError) as context:
+            self.config_manager.import_patterns(patterns)
+
+        failed = {error['pattern'] for error in context.exception.errors}
+        self.assertEqual(failed, {"BAD_REGEX", "BAD_FORMAT", "NO_YEAR_GROUP"})
+        self.assertIsNone(self.config_manager.get_pattern("GOOD"))
+        self.assertFalse(os.path.exists(self.config_file))
+
+    def test_export_import_round_trip(self):
+        for name in ("patterns.json", "patterns.csv"):
+            path = os.path.join(self.test_dir, name)
+            self.assertEqual(self.config_manager.write_patterns_file(path), 3)
+
+            other = ConfigManager(os.path.join(self.test_dir, "other.json"))
+            other.import_patterns(other.read_patterns_file(path), replace=True)
+            self.assertEqual(other.get_all_patterns(), self.config_manager.get_all_patterns())
+
+    def test_read_rejects_non_mapping_patterns(self):
+        path = os.path.join(self.test_dir, "patterns.json")
+        with open(path, 'w') as f:
+            json.dump({"patterns": [{"regex": r"A(\d+)", "folder_format": "A/{number}"}]}, f)
+
+        with self.assertRaises(PatternImportError):
+            self.config_manager.read_patterns_file(path)
+        with self.assertRaises(PatternImportError):
+            self.config_manager.import_patterns(["not", "a", "mapping"])
+
+    def test_read_csv_reports_duplicate_names(self):
+        path = os.path.join(self.test_dir, "patterns.csv")
+        with open(path, 'w', newline='') as f:
+            f.write("name,regex,folder_format\n"
+                    "DUP,D(\\d+),D/{number}\n"
+                    "OTHER,O(\\d+),O/{number}\n"
+                    "DUP,X(\\d+),X/{number}\n")
+
+        with self.assertRaises(PatternImportError) as context:
+            self.config_manager.read_patterns_file(path)
+        self.assertEqual(context.exception.errors,
+                         [{'pattern': "DUP", 'error': "Duplicate pattern name on row 4"}])
+
+if __name__ == '__main__':
+    unittest.main()
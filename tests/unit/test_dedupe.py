@@ -0,0 +1,124 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from helpers import ACC_PATTERN
+from core.engine import OrganizerEngine, OrganizerOptions
+from core.dedupe import (DuplicateFinder, HashCache, PARTIAL_HASH_SIZE, file_hash,
+                             hash_cache_path_for, quarantine_dir_for)
+from utils.metrics import RunMetrics
+
+class TestDuplicateFinder(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, filename, content):
+        path = os.path.join(self.test_dir, filename)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def files(self, *names):
+        paths = {name: os.path.join(self.test_dir, name) for name in names}
+        return {name: (path, os.stat(path)) for name, path in paths.items()}
+
+    def test_file_hash_limit(self):
+        path = self.write("a.pdf", b"x" * PARTIAL_HASH_SIZE + b"tail")
+
+        self.assertEqual(file_hash(path, PARTIAL_HASH_SIZE), file_hash(self.write("b.pdf", b"x" * PARTIAL_HASH_SIZE)))
+        self.assertNotEqual(file_hash(path), file_hash(path, PARTIAL_HASH_SIZE))
+
+    def test_groups(self):
+        head = b"x" * PARTIAL_HASH_SIZE
+        self.write("ACC1.23.pdf", head + b"one")
+        self.write("ACC1.23 (1).pdf", head + b"one")
+        self.write("ACC1.23 (2).pdf", b"y" + head[1:] + b"two")
+        self.write("ACC2.23.pdf", b"unique size")
+        self.write("empty1.pdf", b"")
+        self.write("empty2.pdf", b"")
+        metrics = RunMetrics()
+
+        groups = DuplicateFinder(metrics=metrics).find(self.files(
+            "ACC1.23 (1).pdf", "ACC1.23.pdf", "ACC1.23 (2).pdf", "ACC2.23.pdf",
+            "empty1.pdf", "empty2.pdf"))
+
+        self.assertEqual(groups, [["ACC1.23.pdf", "ACC1.23 (1).pdf"]])
+        # Three partial hashes, then two full hashes; the unique size is never read
+        self.assertEqual(metrics.report()['stages']['hash']['count'], 5)
+
+    def test_cache_makes_reruns_free(self):
+        for name in ("ACC1.23.pdf", "ACC1.23 (1).pdf"):
+            self.write(name, b"same scan")
+        path = hash_cache_path_for(self.test_dir)
+        cache = HashCache.load(path)
+        DuplicateFinder(cache).find(self.files("ACC1.23.pdf", "ACC1.23 (1).pdf"))
+        cache.save()
+
+        metrics = RunMetrics()
+        groups = DuplicateFinder(HashCache.load(path), metrics=metrics).find(
+            self.files("ACC1.23.pdf", "ACC1.23 (1).pdf"))
+
+        self.assertEqual(len(groups), 1)
+        self.assertNotIn('hash', metrics.report()['stages'])
+        self.assertEqual(metrics.report()['counters']['hash_cache_hits'], 4)
+
+    def test_changed_file_is_hashed_again(self):
+        cache = HashCache()
+        path = self.write("ACC1.23.pdf", b"first")
+        stat = os.stat(path)
+        cache.put(stat, 'full', 'abc')
+        self.assertEqual(cache.get(stat, 'full'), 'abc')
+
+        self.write("ACC1.23.pdf", b"second version")
+
+        self.assertIsNone(cache.get(os.stat(path), 'full'))
+
+class TestDedupeRun(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for filename in ["ACC134.23.pdf", "ACC134.23 (1).pdf", "ACC135.23.pdf"]:
+            with open(os.path.join(self.test_dir, filename), 'w') as f:
+                f.write("same scan")
+        with open(os.path.join(self.test_dir, "ACC136.23.pdf"), 'w') as f:
+            f.write("different")
+        self.target_dir = os.path.join(self.test_dir, "ACC", "2023", "ACC134.2023")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def organize(self, action, **options):
+        engine = OrganizerEngine(OrganizerOptions(dedupe=action, **options))
+        return engine, engine.process_files(self.test_dir, ACC_PATTERN)
+
+    def test_skip(self):
+        _, result = self.organize("skip", backup_before_move=True)
+
+        self.assertEqual(result.duplicates, 2)
+        self.assertEqual((result.moved, result.skipped, result.backups), (2, 2, 2))
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "ACC134.23 (1).pdf")))
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "ACC135.23.pdf")))
+
+    def test_link(self):
+        _, result = self.organize("link", workers=4)
+
+        self.assertEqual((result.moved, result.failed), (4, 0))
+        original = os.path.join(self.target_dir, "ACC134.23.pdf")
+        for linked in (os.path.join(self.target_dir, "ACC134.23 (1).pdf"),
+                       os.path.join(self.test_dir, "ACC", "2023", "ACC135.2023", "ACC135.23.pdf")):
+            self.assertTrue(os.path.samefile(original, linked))
+        self.assertEqual(os.stat(original).st_nlink, 3)
+
+    def test_quarantine(self):
+        engine, result = self.organize("quarantine")
+
+        self.assertEqual(result.moved, 4)
+        quarantine = quarantine_dir_for(self.test_dir, engine.run_id)
+        self.assertEqual(sorted(os.listdir(quarantine)), ["ACC134.23 (1).pdf", "ACC135.23.pdf"])
+        self.assertEqual(os.listdir(self.target_dir), ["ACC134.23.pdf"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from helpers import ACC_PATTERN
+from core.engine import OrganizerEngine, OrganizerOptions
+from utils.file_utils import MoveResult
+
+class TestOrganizerEngine(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for filename in ["ACC134.23.pdf", "ACC135.22.pdf", "HRER1.23.pdf", "notes.txt"]:
+            with open(os.path.join(self.test_dir, filename), 'w') as f:
+                f.write("test content")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_process_files(self):
+        engine = OrganizerEngine()
+        result = engine.process_files(self.test_dir, ACC_PATTERN, "ACC")
+
+        self.assertEqual(result.scanned, 4)
+        self.assertEqual(result.matched, 2)
+        self.assertEqual(result.moved, 2)
+        self.assertEqual(result.failed, 0)
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.test_dir, "ACC", "2023", "ACC134.2023", "ACC134.23.pdf")))
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "HRER1.23.pdf")))
+
+    def test_backup_option(self):
+        engine = OrganizerEngine(OrganizerOptions(backup_before_move=True))
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.backups, 2)
+        self.assertEqual(sum(result.backup_methods.values()), 2)
+        backup = os.path.join(self.test_dir, ".backups", engine.run_id, "ACC134.23.pdf")
+        with open(backup) as f:
+            self.assertEqual(f.read(), "test content")
+        self.assertFalse(any(f.endswith(".bak") for f in os.listdir(self.test_dir)))
+
+    def test_backup_root_and_method(self):
+        backup_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, backup_root)
+        engine = OrganizerEngine(OrganizerOptions(backup_before_move=True, backup_root=backup_root,
+                                                  backup_method="copy"))
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.backup_methods, {"copy": 2})
+        self.assertTrue(os.path.isfile(os.path.join(backup_root, engine.run_id, "ACC135.22.pdf")))
+
+    def test_progress_callback(self):
+        calls = []
+        engine = OrganizerEngine()
+        engine.process_files(self.test_dir, ACC_PATTERN,
+                             progress_callback=lambda *args: calls.append(args))
+
+        # The total is unknown until the streamed scan has finished
+        self.assertEqual(calls[0][:2], (0, None))
+        self.assertEqual(calls[-1][:2], (2, 2))
+        self.assertTrue(all(total is None or total >= current for current, total, _ in calls))
+
+    def test_progress_does_not_list_twice_by_default(self):
+        engine = OrganizerEngine()
+        with mock.patch.object(engine.file_utils, 'scan_entries',
+                               wraps=engine.file_utils.scan_entries) as scan_entries:
+            engine.process_files(self.test_dir, ACC_PATTERN, progress_callback=lambda *args: None)
+
+        self.assertEqual(scan_entries.call_count, 1)
+
+    def test_progress_estimate_is_streamed(self):
+        for i in range(200):
+            with open(os.path.join(self.test_dir, f"ACC{i}.21.pdf" if i % 2 else f"other{i}.txt"), 'w') as f:
+                f.write("test content")
+        calls = []
+        engine = OrganizerEngine(OrganizerOptions(count_entries=True))
+        result = engine.process_files(self.test_dir, ACC_PATTERN,
+                                      progress_callback=lambda *args: calls.append(args[:2]))
+
+        self.assertEqual(result.moved, 102)
+        self.assertEqual(calls[-1], (102, 102))
+        self.assertTrue(all(total and total >= current for current, total in calls[1:]))
+
+    def test_cancel(self):
+        engine = OrganizerEngine()
+        engine.cancel()
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertTrue(result.cancelled)
+        self.assertEqual(result.moved, 0)
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "ACC")))
+
+    def test_recursive(self):
+        nested = os.path.join(self.test_dir, "incoming")
+        os.makedirs(nested)
+        with open(os.path.join(nested, "ACC7.23.pdf"), 'w') as f:
+            f.write("test content")
+        engine = OrganizerEngine(OrganizerOptions(recursive=True))
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.moved, 3)
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.test_dir, "ACC", "2023", "ACC7.2023", "ACC7.23.pdf")))
+
+        # Organized folders are not scanned again
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+        self.assertEqual(result.matched, 0)
+
+    def test_parallel_workers(self):
+        for i in range(50):
+            with open(os.path.join(self.test_dir, f"ACC{i}.21.pdf"), 'w') as f:
+                f.write("test content")
+        calls = []
+        engine = OrganizerEngine(OrganizerOptions(backup_before_move=True, workers=4, max_in_flight=3))
+        result = engine.process_files(self.test_dir, ACC_PATTERN,
+                                      progress_callback=lambda *args: calls.append(args[0]))
+
+        self.assertEqual(result.moved, 52)
+        self.assertEqual(result.backups, 52)
+        self.assertEqual(calls, list(range(53)))
+        self.assertEqual(len(os.listdir(os.path.join(self.test_dir, "ACC", "2021"))), 50)
+
+    def test_parallel_errors(self):
+        engine = OrganizerEngine(OrganizerOptions(workers=2))
+        engine.file_utils.move = lambda src, dst, **kwargs: MoveResult(False, "rename", "permission", "denied")
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.moved, 0)
+        self.assertEqual(result.failed, 2)
+        self.assertEqual(result.errors[0]['category'], "permission")
+        self.assertIn("denied", result.errors[0]['error'])
+
+    def test_target_directories_created_once(self):
+        for i in range(20):
+            with open(os.path.join(self.test_dir, f"ACC7.21 ({i}).pdf"), 'w') as f:
+                f.write("test content")
+        engine = OrganizerEngine(OrganizerOptions(workers=4))
+        created = []
+        ensure_directory = engine.file_utils.ensure_directory
+        engine.file_utils.ensure_directory = lambda path: (created.append(path), ensure_directory(path))
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.moved, 22)
+        self.assertEqual(len(created), 3)
+
+    def test_target_directory_removed_mid_run(self):
+        engine = OrganizerEngine()
+        target_dir = os.path.join(self.test_dir, "ACC", "2023", "ACC134.2023")
+        engine.ensure_target_dir(target_dir)
+        shutil.rmtree(os.path.join(self.test_dir, "ACC"))
+
+        engine.move_to_target(self.test_dir, "ACC134.23.pdf", target_dir,
+                              os.path.join(target_dir, "ACC134.23.pdf"))
+
+        self.assertTrue(os.path.isfile(os.path.join(target_dir, "ACC134.23.pdf")))
+
+    def test_plan_has_no_side_effects(self):
+        os.makedirs(os.path.join(self.test_dir, "ACC", "2023", "ACC134.2023"))
+        with open(os.path.join(self.test_dir, "ACC", "2023", "ACC134.2023", "ACC134.23.pdf"), 'w') as f:
+            f.write("already organized")
+        before = sorted(os.walk(self.test_dir))
+
+        plan = OrganizerEngine().plan_patterns(self.test_dir, {"ACC": ACC_PATTERN})
+
+        self.assertEqual(sorted(os.walk(self.test_dir)), before)
+        self.assertEqual(len(plan.operations), 2)
+        self.assertEqual(plan.directories, {os.path.join(self.test_dir, "ACC", "2022", "ACC135.2022")})
+        self.assertEqual([c['reason'] for c in plan.collisions], ['exists'])
+
+    def test_execute_plan(self):
+        engine = OrganizerEngine()
+        plan = engine.plan_patterns(self.test_dir, {"ACC": ACC_PATTERN})
+        result = engine.execute_plan(plan)
+
+        self.assertEqual(result.moved, 2)
+        for operation in plan.operations:
+            self.assertTrue(os.path.isfile(operation.target_path))
+
+    def organize_with_existing(self, policy, content):
+        target_dir = os.path.join(self.test_dir, "ACC", "2023", "ACC134.2023")
+        os.makedirs(target_dir)
+        with open(os.path.join(target_dir, "ACC134.23.pdf"), 'w') as f:
+            f.write(content)
+        engine = OrganizerEngine(OrganizerOptions(on_collision=policy))
+        return engine.process_files(self.test_dir, ACC_PATTERN), target_dir
+
+    def test_collision_suffix(self):
+        result, target_dir = self.organize_with_existing("suffix", "older scan")
+
+        self.assertEqual(result.moved, 2)
+        self.assertEqual(result.collisions, {'renamed': 1})
+        self.assertEqual(sorted(os.listdir(target_dir)), ["ACC134.23 (1).pdf", "ACC134.23.pdf"])
+
+    def test_collision_skip(self):
+        result, target_dir = self.organize_with_existing("skip", "older scan")
+
+        self.assertEqual((result.moved, result.skipped), (1, 1))
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "ACC134.23.pdf")))
+        with open(os.path.join(target_dir, "ACC134.23.pdf")) as f:
+            self.assertEqual(f.read(), "older scan")
+
+    def test_collision_hash_identical(self):
+        result, target_dir = self.organize_with_existing("hash", "test content")
+
+        self.assertEqual(result.collisions, {'duplicate': 1})
+        self.assertEqual(result.skipped, 1)
+        self.assertEqual(os.listdir(target_dir), ["ACC134.23.pdf"])
+
+    def test_collision_hash_different(self):
+        result, target_dir = self.organize_with_existing("hash", "older scan")
+
+        self.assertEqual(result.collisions, {'renamed': 1})
+        self.assertIn("ACC134.23 (1).pdf", os.listdir(target_dir))
+
+    def test_collision_overwrite(self):
+        result, target_dir = self.organize_with_existing("overwrite", "older scan")
+
+        self.assertEqual(result.collisions, {'overwritten': 1})
+        self.assertEqual(os.listdir(target_dir), ["ACC134.23.pdf"])
+        with open(os.path.join(target_dir, "ACC134.23.pdf")) as f:
+            self.assertEqual(f.read(), "test content")
+
+    def test_target_names_listed_once_per_directory(self):
+        for i in range(5):
+            with open(os.path.join(self.test_dir, f"ACC7.21_{i}.pdf"), 'w') as f:
+                f.write("test content")
+        engine = OrganizerEngine()
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.moved, 7)
+        self.assertEqual(engine.target_names.listed, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1 +1,153 @@
- 
\ No newline at end of file
+import unittest
+import os
+import errno
+import json
+import shutil
+import tempfile
+from unittest import mock
+import helpers  # noqa: F401 (puts src on sys.path)
+from utils.file_utils import FileUtils, DirectoryCache
+
+class TestFileUtils(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "nested", "deeper"))
+        os.makedirs(os.path.join(self.test_dir, "ACC", "2023"))
+        for path in ["ACC1.23.pdf", "notes.txt",
+                     os.path.join("nested", "ACC2.23.pdf"),
+                     os.path.join("nested", "deeper", "ACC3.23.pdf"),
+                     os.path.join("ACC", "2023", "ACC4.23.pdf")]:
+            with open(os.path.join(self.test_dir, path), 'w') as f:
+                f.write("test content")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_scan_files(self):
+        scanned = sorted(FileUtils.scan_files(self.test_dir))
+        self.assertEqual(scanned, [("ACC1.23.pdf", "ACC1.23.pdf"), ("notes.txt", "notes.txt")])
+
+    def test_scan_files_is_lazy(self):
+        scanner = FileUtils.scan_files(self.test_dir)
+        self.assertIn(next(scanner)[1], ("ACC1.23.pdf", "notes.txt"))
+        scanner.close()
+
+    def test_scan_files_recursive(self):
+        scanned = sorted(path for path, _ in FileUtils.scan_files(
+            self.test_dir, recursive=True, exclude={"ACC"}))
+        self.assertEqual(scanned, sorted([
+            "ACC1.23.pdf", "notes.txt",
+            os.path.join("nested", "ACC2.23.pdf"),
+            os.path.join("nested", "deeper", "ACC3.23.pdf")
+        ]))
+
+    def test_scan_missing_directory(self):
+        with self.assertRaises(OSError):
+            list(FileUtils.scan_files(os.path.join(self.test_dir, "missing")))
+
+    def test_move_same_device(self):
+        src = os.path.join(self.test_dir, "ACC1.23.pdf")
+        dst = os.path.join(self.test_dir, "nested", "ACC1.23.pdf")
+        result = FileUtils.move(src, dst)
+
+        self.assertTrue(result)
+        self.assertEqual(result.method, "rename")
+        self.assertTrue(os.path.isfile(dst))
+        self.assertFalse(os.path.exists(src))
+
+    def test_move_cross_device_fallback(self):
+        src = os.path.join(self.test_dir, "ACC1.23.pdf")
+        dst = os.path.join(self.test_dir, "nested", "ACC1.23.pdf")
+        with mock.patch("os.rename", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            result = FileUtils.move(src, dst)
+
+        self.assertTrue(result)
+        self.assertEqual(result.method, "copy")
+        with open(dst) as f:
+            self.assertEqual(f.read(), "test content")
+        self.assertFalse(os.path.exists(src))
+        self.assertFalse(os.path.exists(dst + ".partial"))
+
+    def test_move_cross_device_keeps_existing_target(self):
+        src = os.path.join(self.test_dir, "ACC1.23.pdf")
+        dst = os.path.join(self.test_dir, "nested", "ACC1.23.pdf")
+        with open(dst, 'w') as f:
+            f.write("existing")
+        with mock.patch("os.rename", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            result = FileUtils.move(src, dst)
+
+        self.assertFalse(result)
+        self.assertEqual(result.category, "exists")
+        with open(dst) as f:
+            self.assertEqual(f.read(), "existing")
+        self.assertTrue(os.path.exists(src))
+        self.assertFalse(os.path.exists(dst + ".partial"))
+
+        with mock.patch("os.rename", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            self.assertTrue(FileUtils.move(src, dst, overwrite=True))
+        with open(dst) as f:
+            self.assertEqual(f.read(), "test content")
+
+    def test_move_error_category(self):
+        result = FileUtils.move(os.path.join(self.test_dir, "missing.pdf"),
+                                os.path.join(self.test_dir, "nested", "missing.pdf"))
+
+        self.assertFalse(result)
+        self.assertEqual(result.category, "not_found")
+        self.assertFalse(FileUtils.move_file(os.path.join(self.test_dir, "missing.pdf"),
+                                             os.path.join(self.test_dir, "x.pdf")))
+
+    @unittest.skipIf(os.name == 'nt', "POSIX permission bits")
+    def test_write_json_atomic_keeps_mode(self):
+        path = os.path.join(self.test_dir, "state.json")
+        FileUtils.write_json_atomic(path, {})
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+
+        os.chmod(path, 0o640)
+        FileUtils.write_json_atomic(path, {'a': 1})
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+
+    def test_write_json_atomic_leaves_umask_alone(self):
+        path = os.path.join(self.test_dir, "state.json")
+        # Changing the umask, even briefly, affects files other threads create
+        with mock.patch('os.umask', side_effect=AssertionError("umask changed")):
+            FileUtils.write_json_atomic(path, {})
+            FileUtils.write_json_atomic(path, {'a': 1})
+
+        with open(path) as f:
+            self.assertEqual(json.load(f), {'a': 1})
+        self.assertFalse([name for name in os.listdir(self.test_dir) if name.endswith(".tmp")])
+
+class TestDirectoryCache(unittest.TestCase):
+    def test_ensure_creates_once(self):
+        created = []
+        cache = DirectoryCache(create=created.append)
+
+        self.assertTrue(cache.ensure("a"))
+        self.assertFalse(cache.ensure("a"))
+        self.assertEqual(created, ["a"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        created = []
+        cache = DirectoryCache(maxsize=2, create=created.append)
+        for path in ["a", "b", "a", "c", "a", "b"]:
+            cache.ensure(path)
+
+        self.assertEqual(created, ["a", "b", "c", "b"])
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("c", cache)
+
+    def test_discard(self):
+        created = []
+        cache = DirectoryCache(create=created.append)
+        cache.ensure("a")
+        cache.discard("a")
+        cache.ensure("a")
+
+        self.assertEqual(created, ["a", "a"])
+
+if __name__ == '__main__':
+    unittest.main()
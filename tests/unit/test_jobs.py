@@ -0,0 +1,119 @@
+import unittest
+import io
+import os
+import json
+import shutil
+import tempfile
+
+import helpers  # noqa: F401 (puts src on sys.path)
+from cli import main
+from core.jobs import JobScheduler, JobSpecError, parse_job_spec
+from utils.logger import Logger, get_backend
+
+CONFIG = {
+    "patterns": {
+        "ACC": {
+            "regex": r"ACC(\d+)\.(\d{2})",
+            "folder_format": "ACC/{year}/ACC{number}.{year}",
+            "description": "Accident case files (format: ACC134.23)",
+            "sort_by": ["number", "year"]
+        },
+        "HRER": {
+            "regex": r"HRER(\d+)\.(\d{2})",
+            "folder_format": "HRER/{year}/HRER{number}.{year}",
+            "description": "Human rights enforcement report files (format: HRER134.23)",
+            "sort_by": ["number", "year"]
+        }
+    },
+    "settings": {"create_year_folders": True, "sort_by_year": True, "backup_before_move": False}
+}
+
+def logging_runner(job):
+    """Report whether the worker's log records have a live listener"""
+    thread = get_backend()['listener']._thread
+    return {'job': job['id'], 'directory': job['directory'], 'device': job['device_key'],
+            'listening': thread is not None and thread.is_alive()}
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.work_dir, "file_patterns.json"), 'w') as f:
+            json.dump(CONFIG, f)
+        self.directories = []
+        for name in ("share1", "share2"):
+            directory = os.path.join(self.work_dir, name)
+            os.makedirs(directory)
+            for filename in ["ACC134.23.pdf", "HRER1.22.pdf", "notes.txt"]:
+                with open(os.path.join(directory, filename), 'w') as f:
+                    f.write("test content")
+            self.directories.append(directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_spec_validation(self):
+        with self.assertRaises(JobSpecError) as context:
+            parse_job_spec({"jobs": [{"directory": "a", "colour": "red"},
+                                     {"patterns": "all"},
+                                     {"directory": "b", "options": {"speed": 11}}]})
+
+        self.assertEqual([e['job'] for e in context.exception.errors], [0, 1, 2])
+
+    def test_defaults_are_merged(self):
+        jobs = parse_job_spec({
+            "defaults": {"patterns": ["ACC"], "options": {"workers": 4}},
+            "jobs": [{"directory": "a"}, {"directory": "b", "options": {"workers": 2}}]
+        }, base_dir="/specs")
+
+        self.assertEqual(jobs[0]['patterns'], ["ACC"])
+        self.assertEqual([job['options']['workers'] for job in jobs], [4, 2])
+        self.assertEqual(jobs[0]['config'], os.path.join("/specs", "file_patterns.json"))
+
+    def test_relative_paths_use_spec_folder(self):
+        base_dir = os.path.abspath("specs")
+        jobs = parse_job_spec({"jobs": [
+            {"directory": "intake", "config": "other.json"},
+            {"directory": os.path.abspath("scans")}
+        ]}, base_dir=base_dir)
+
+        self.assertEqual(jobs[0]['directory'], os.path.join(base_dir, "intake"))
+        self.assertEqual(jobs[0]['config'], os.path.join(base_dir, "other.json"))
+        self.assertEqual(jobs[1]['directory'], os.path.abspath("scans"))
+
+    def test_workers_drain_their_own_logs(self):
+        Logger(log_dir=None)
+        jobs = [{'id': i, 'directory': d} for i, d in enumerate(self.directories)]
+        report = JobScheduler(jobs, max_workers=2, runner=logging_runner).run()
+
+        self.assertTrue(all(job['listening'] for job in report['jobs']))
+
+    def test_per_device_cap(self):
+        jobs = [{'id': i, 'directory': f"d{i}", 'device': device}
+                for i, device in enumerate(["nas1", "nas1", "nas1", "nas2"])]
+        scheduler = JobScheduler(jobs, max_workers=4, per_device=2)
+
+        started = [scheduler.next_job() for _ in range(4)]
+
+        self.assertEqual(sorted(job['device'] for job in started[:3]), ["nas1", "nas1", "nas2"])
+        self.assertIsNone(started[3])
+
+    def test_run_spec(self):
+        spec_file = os.path.join(self.work_dir, "jobs.json")
+        with open(spec_file, 'w') as f:
+            json.dump({"defaults": {"patterns": "all"},
+                       "jobs": [{"directory": d} for d in self.directories] +
+                               [{"directory": os.path.join(self.work_dir, "missing")}]}, f)
+        stream = io.StringIO()
+        code = main(["jobs", spec_file, "--max-workers", "2"], stream=stream)
+        report = json.loads(stream.getvalue())
+
+        self.assertEqual(code, 1)
+        self.assertEqual(report['summary']['moved'], 4)
+        self.assertEqual(report['summary']['jobs'], 3)
+        self.assertEqual(report['summary']['failed_jobs'], 1)
+        self.assertEqual([job['job'] for job in report['jobs']], [0, 1, 2])
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.directories[1], "HRER", "2022", "HRER1.2022", "HRER1.22.pdf")))
+
+if __name__ == '__main__':
+    unittest.main()
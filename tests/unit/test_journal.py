@@ -0,0 +1,144 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+
+from helpers import ACC_PATTERN
+from core.engine import OrganizerEngine, OrganizerOptions
+from core.journal import Checkpoint, RunJournal, checkpoint_path_for, journal_path_for, undo_run
+
+class Crash(BaseException):
+    pass
+
+class TestRunJournal(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original = ["ACC134.23.pdf", "ACC135.22.pdf", "notes.txt"]
+        for filename in self.original:
+            with open(os.path.join(self.test_dir, filename), 'w') as f:
+                f.write(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def organize(self, **options):
+        engine = OrganizerEngine(OrganizerOptions(**options))
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+        return engine, result
+
+    def test_journal_records(self):
+        engine, result = self.organize()
+        path = journal_path_for(self.test_dir, engine.run_id)
+        records = list(RunJournal.read(path))
+
+        self.assertEqual(result.journal_path, path)
+        self.assertEqual([r['type'] for r in records], ['run', 'move', 'move', 'end'])
+        self.assertEqual(records[0]['run_id'], engine.run_id)
+        moves = {r['src']: r['dst'] for r in records if r['type'] == 'move'}
+        self.assertEqual(moves["ACC134.23.pdf"],
+                         os.path.join("ACC", "2023", "ACC134.2023", "ACC134.23.pdf"))
+
+    def test_torn_last_line_is_ignored(self):
+        engine, _ = self.organize()
+        path = journal_path_for(self.test_dir, engine.run_id)
+        with open(path, 'a') as f:
+            f.write('{"type":"mo')
+
+        self.assertEqual(len(list(RunJournal.read(path))), 4)
+
+    def test_undo_restores_run(self):
+        engine, _ = self.organize()
+        summary = undo_run(journal_path_for(self.test_dir, engine.run_id))
+
+        self.assertEqual(summary['restored'], 2)
+        self.assertEqual(summary['failed'], 0)
+        entries = sorted(e for e in os.listdir(self.test_dir) if not e.startswith('.'))
+        self.assertEqual(entries, sorted(self.original))
+        with open(os.path.join(self.test_dir, "ACC134.23.pdf")) as f:
+            self.assertEqual(f.read(), "ACC134.23.pdf")
+
+    def test_undo_uses_backup_and_reports_conflicts(self):
+        engine, _ = self.organize(backup_before_move=True)
+        os.remove(os.path.join(self.test_dir, "ACC", "2023", "ACC134.2023", "ACC134.23.pdf"))
+        with open(os.path.join(self.test_dir, "ACC135.22.pdf"), 'w') as f:
+            f.write("new file")
+
+        path = journal_path_for(self.test_dir, engine.run_id)
+        summary = undo_run(path)
+
+        self.assertEqual(summary['from_backup'], 1)
+        self.assertEqual(summary['conflicts'], 1)
+        with open(os.path.join(self.test_dir, "ACC135.22.pdf")) as f:
+            self.assertEqual(f.read(), "new file")
+        with open(path) as f:
+            self.assertEqual(json.loads(f.readlines()[-1])['type'], 'undo')
+
+    def test_journal_disabled(self):
+        engine, result = self.organize(journal=False)
+
+        self.assertIsNone(result.journal_path)
+        self.assertFalse(os.path.exists(journal_path_for(self.test_dir, engine.run_id)))
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for i in range(10):
+            with open(os.path.join(self.test_dir, f"ACC{i}.23.pdf"), 'w') as f:
+                f.write("test content")
+        self.checkpoint = Checkpoint(checkpoint_path_for(self.test_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def crash_after(self, engine, count):
+        move = engine.file_utils.move
+        calls = []
+
+        def failing_move(src, dst, **kwargs):
+            if len(calls) == count:
+                raise Crash()
+            calls.append(src)
+            return move(src, dst, **kwargs)
+        engine.file_utils.move = failing_move
+
+    def test_completed_run_clears_checkpoint(self):
+        OrganizerEngine().process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertIsNone(self.checkpoint.load())
+
+    def test_resume_after_crash(self):
+        engine = OrganizerEngine(OrganizerOptions(checkpoint_every=2))
+        self.crash_after(engine, 4)
+        with self.assertRaises(Crash):
+            engine.process_files(self.test_dir, ACC_PATTERN)
+        state = self.checkpoint.load()
+        self.assertEqual(state['run_id'], engine.run_id)
+        self.assertEqual(state['moved'], 4)
+
+        # A file reusing a moved name is skipped, not re-matched
+        done = sorted(RunJournal.completed_sources(state['journal']))[0]
+        with open(os.path.join(self.test_dir, done), 'w') as f:
+            f.write("new file")
+
+        resumed = OrganizerEngine(OrganizerOptions(resume=True))
+        result = resumed.process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.run_id, engine.run_id)
+        self.assertEqual(result.resumed, 4)
+        self.assertEqual(result.moved, 6)
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, done)))
+        self.assertIsNone(self.checkpoint.load())
+
+        summary = undo_run(result.journal_path)
+        self.assertEqual(summary['restored'], 9)
+        self.assertEqual(summary['conflicts'], 1)
+
+    def test_resume_without_checkpoint_starts_new_run(self):
+        result = OrganizerEngine(OrganizerOptions(resume=True)).process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertEqual(result.resumed, 0)
+        self.assertEqual(result.moved, 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,22 @@
 import unittest
 import os
+import logging.handlers
+import json
 import logging
 import shutil
 from datetime import datetime
-from src.utils.logger import Logger
+import helpers  # noqa: F401 (puts src on sys.path)
+from utils.logger import Logger
 
 class TestLogger(unittest.TestCase):
     def setUp(self):
         self.test_dir = "test_logs"
         os.makedirs(self.test_dir, exist_ok=True)
+        Logger.shutdown()
         self.logger = Logger(log_level=logging.DEBUG)
         
     def tearDown(self):
+        Logger.shutdown()
         shutil.rmtree(self.test_dir)
         
     def test_logger_creation(self):
@@ -24,6 +29,7 @@ class TestLogger(unittest.TestCase):
     def test_log_file_creation(self):
         logger = self.logger.get_logger()
         logger.info("Test log message")
+        Logger.flush()
         
         # Check if log file was created
         log_files = [f for f in os.listdir('logs') if f.startswith('organizer_')]
@@ -43,6 +49,7 @@ class TestLogger(unittest.TestCase):
         logger.info("Info message")
         logger.warning("Warning message")
         logger.error("Error message")
+        Logger.flush()
         
         # Check if all messages were logged
         log_files = [f for f in os.listdir('logs') if f.startswith('organizer_')]
@@ -59,6 +66,7 @@ class TestLogger(unittest.TestCase):
     def test_log_format(self):
         logger = self.logger.get_logger()
         logger.info("Test message")
+        Logger.flush()
         
         log_files = [f for f in os.listdir('logs') if f.startswith('organizer_')]
         latest_log = max(log_files, key=lambda x: os.path.getctime(os.path.join('logs', x)))
@@ -71,16 +79,36 @@ class TestLogger(unittest.TestCase):
         
     def test_multiple_handlers(self):
         logger = self.logger.get_logger()
-        self.assertEqual(len(logger.handlers), 2)  # File and console handlers
+        # A single queue handler; file and console handlers run on the listener thread
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIsInstance(logger.handlers[0], logging.handlers.QueueHandler)
+        self.assertEqual(len(self.logger.handlers), 2)  # Console and file handlers
         
-    def test_log_rotation(self):
-        # Create multiple log files
+    def test_repeated_setup_is_idempotent(self):
         for i in range(3):
             logger = Logger(log_level=logging.DEBUG)
-            logger.get_logger().info(f"Test message {i}")
+            logger.get_logger().info(f"Repeated message {i}")
+        Logger.flush()
             
-        log_files = [f for f in os.listdir('logs') if f.startswith('organizer_')]
-        self.assertEqual(len(log_files), 3)
+        self.assertEqual(len(logger.get_logger().handlers), 1)
+        with open(self.logger.handlers[1].baseFilename) as f:
+            content = f.read()
+        for i in range(3):
+            self.assertEqual(content.count(f"Repeated message {i}"), 1)
+
+    def test_structured_log_rotation(self):
+        logger = Logger(log_dir=self.test_dir, structured=True, max_bytes=1000, backup_count=2)
+        for i in range(50):
+            logger.get_logger().info(f"Moved file {i}", extra={'event': 'moved', 'file': f"ACC{i}.23.pdf"})
+        Logger.flush()
+
+        files = sorted(f for f in os.listdir(self.test_dir) if f.startswith('organizer.ndjson'))
+        self.assertEqual(files, ['organizer.ndjson', 'organizer.ndjson.1', 'organizer.ndjson.2'])
+        with open(os.path.join(self.test_dir, 'organizer.ndjson')) as f:
+            record = json.loads(f.readline())
+        self.assertEqual(record['event'], 'moved')
+        self.assertEqual(record['level'], 'INFO')
+        self.assertIn('Moved file', record['message'])
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
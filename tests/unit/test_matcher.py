@@ -0,0 +1,107 @@
+import unittest
+
+import helpers  # noqa: F401 (puts src on sys.path)
+from core.matcher import PatternMatcher, PrefixTrie, literal_prefix
+
+PATTERNS = {
+    "ACC": {"regex": r"ACC(\d+)\.(\d{2})", "folder_format": "ACC/{year}/ACC{number}.{year}"},
+    "HREPN": {"regex": r"HREPN(\d+)\.(\d{2})", "folder_format": "HREPN/{year}/HREPN{number}.{year}"},
+    "HRER": {"regex": r"HRER(\d+)\.(\d{2})", "folder_format": "HRER/{year}/HRER{number}.{year}"},
+    "test": {"regex": r"test(\d+)", "folder_format": "test_{number}"}
+}
+
+class TestPatternMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = PatternMatcher(PATTERNS)
+
+    def test_combined_regex(self):
+        self.assertIsNotNone(self.matcher.combined)
+
+    def test_match_groups(self):
+        for filename, name, groups in [
+            ("ACC134.23.pdf", "ACC", ("134", "23")),
+            ("HREPN7.21.pdf", "HREPN", ("7", "21")),
+            ("HRER55.20.pdf", "HRER", ("55", "20")),
+            ("test42.txt", "test", ("42",))
+        ]:
+            match = self.matcher.match(filename)
+            self.assertEqual(match.name, name)
+            self.assertEqual(match.groups, groups)
+            self.assertEqual(match.group(1), groups[0])
+
+    def test_no_match(self):
+        self.assertIsNone(self.matcher.match("notes.txt"))
+        self.assertIsNone(self.matcher.match("xACC134.23.pdf"))
+
+    def test_fallback_matches_like_combined(self):
+        patterns = dict(PATTERNS)
+        patterns["BACKREF"] = {"regex": r"(\w)\1x", "folder_format": "{number}"}
+        matcher = PatternMatcher(patterns)
+
+        self.assertIsNone(matcher.combined)
+        self.assertEqual(matcher.match("ACC134.23.pdf").groups, ("134", "23"))
+        self.assertEqual(matcher.match("aax").name, "BACKREF")
+
+    def test_inline_flags_do_not_leak(self):
+        patterns = {"CASELESS": {"regex": r"(?i)hrer(\d+)\.(\d{2})", "folder_format": "H/{number}"},
+                    "ACC": PATTERNS["ACC"]}
+        matcher = PatternMatcher(patterns)
+
+        self.assertIsNone(matcher.combined)
+        self.assertEqual(matcher.match("HRER1.23.pdf").name, "CASELESS")
+        self.assertEqual(matcher.match("ACC1.23.pdf").name, "ACC")
+        self.assertIsNone(matcher.match("acc1.23.pdf"))
+        batch = matcher.classify_batch(["hReR1.23.pdf", "acc1.23.pdf"])
+        self.assertEqual(list(batch.pattern), [0, -1])
+
+    def test_classify(self):
+        names = ["ACC1.23.pdf", "notes.txt", "HRER2.22.pdf"]
+        classified = [(f, m.name) for f, m in self.matcher.classify(names)]
+        self.assertEqual(classified, [("ACC1.23.pdf", "ACC"), ("HRER2.22.pdf", "HRER")])
+
+    def test_literal_prefix(self):
+        for regex, prefix in [
+            (r"ACC(\d+)\.(\d{2})", "ACC"),
+            (r"HR\-E(\d+)", "HR-E"),
+            (r"ACCX?(\d+)", "ACC"),
+            (r"(?i)acc(\d+)", ""),
+            (r"ACC|HRER", ""),
+            (r"\d+", "")
+        ]:
+            self.assertEqual(literal_prefix(regex), prefix, regex)
+
+    def test_prefix_trie(self):
+        trie = PrefixTrie(["HRE", "HREPN", "", "ACC"])
+
+        self.assertEqual(trie.candidates("HREPN7.21.pdf"), (0, 1, 2))
+        self.assertEqual(trie.candidates("HRER7.21.pdf"), (0, 2))
+        self.assertEqual(trie.candidates("notes.txt"), (2,))
+        self.assertIsNone(trie.first_chars())
+        self.assertEqual(PrefixTrie(["HRE", "ACC"]).first_chars(), frozenset("HA"))
+
+    def test_classify_batch(self):
+        names = ["ACC134.23.pdf", "notes.txt", "HRER2.22 (1).pdf", "test42.txt", "xACC1.23.pdf"]
+        batch = self.matcher.classify_batch(names)
+
+        self.assertEqual(len(batch), 5)
+        self.assertEqual(batch.matched, 3)
+        self.assertEqual(batch.row(0), ("ACC", 134, 2023, (0, 9)))
+        self.assertIsNone(batch.row(1))
+        self.assertEqual(batch.row(2), ("HRER", 2, 2022, (0, 8)))
+        self.assertEqual(batch.row(3), ("test", 42, -1, (0, 6)))
+        self.assertEqual(batch.counts(), {"ACC": 1, "HREPN": 0, "HRER": 1, "test": 1})
+
+    def test_classify_batch_agrees_with_match(self):
+        patterns = dict(PATTERNS)
+        patterns["any"] = {"regex": r"\w+?(\d+)", "folder_format": "any_{number}"}
+        matcher = PatternMatcher(patterns)
+        names = ["ACC1.23.pdf", "HREPN5.20.pdf", "scan7.pdf", "notes.txt", "test3", "HRE9.pdf"]
+        batch = matcher.classify_batch(names)
+
+        for i, name in enumerate(names):
+            match = matcher.match(name)
+            row = batch.row(i)
+            self.assertEqual(row and (row[0], row[3]), match and (match.name, match.span), name)
+
+if __name__ == '__main__':
+    unittest.main()
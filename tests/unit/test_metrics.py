@@ -0,0 +1,81 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+
+from helpers import ACC_PATTERN
+from core.engine import OrganizerEngine, OrganizerOptions
+from utils.metrics import Histogram, RunMetrics, NULL_METRICS
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        for i in range(1, 101):
+            histogram.record(i / 1000)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.percentile(50), 0.050, delta=0.005)
+        self.assertAlmostEqual(histogram.percentile(99), 0.099, delta=0.009)
+        self.assertEqual(histogram.percentile(100), 0.1)
+        self.assertEqual(Histogram().percentile(50), 0.0)
+
+    def test_memory_is_bounded(self):
+        histogram = Histogram()
+        for i in range(100000):
+            histogram.record(0.001 + (i % 7) * 1e-5)
+
+        self.assertLess(len(histogram.buckets), 10)
+
+class TestRunMetrics(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for filename in ["ACC134.23.pdf", "ACC134.23 (1).pdf", "notes.txt"]:
+            with open(os.path.join(self.test_dir, filename), 'w') as f:
+                f.write("test content")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_report(self):
+        metrics = RunMetrics()
+        metrics.record("move", metrics.clock())
+        metrics.add("bytes_copied", 10)
+        metrics.add("bytes_copied", 5)
+        report = metrics.report()
+
+        self.assertEqual(report['stages']['move']['count'], 1)
+        self.assertEqual(report['counters'], {'bytes_copied': 15})
+        self.assertIn('p95_ms', report['stages']['move'])
+
+    def test_null_metrics(self):
+        NULL_METRICS.record("move", NULL_METRICS.clock())
+        NULL_METRICS.add("moves")
+        self.assertIsNone(NULL_METRICS.report())
+
+    def test_engine_metrics(self):
+        live_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, live_dir)
+        live_file = os.path.join(live_dir, "metrics.json")
+        engine = OrganizerEngine(OrganizerOptions(metrics=True, metrics_file=live_file,
+                                                  backup_before_move=True, backup_method="copy"))
+        result = engine.process_files(self.test_dir, ACC_PATTERN)
+        metrics = result.to_dict()['metrics']
+
+        self.assertEqual(metrics['stages']['match']['count'], 3)
+        self.assertEqual(metrics['stages']['move']['count'], 2)
+        self.assertEqual(metrics['stages']['backup']['count'], 2)
+        self.assertEqual(metrics['counters']['makedirs'], 1)
+        self.assertEqual(metrics['counters']['makedirs_avoided'], 1)
+        self.assertEqual(metrics['counters']['moves_rename'], 2)
+        self.assertEqual(metrics['counters']['bytes_copied'], 24)
+        with open(live_file) as f:
+            self.assertEqual(json.load(f)['counters'], metrics['counters'])
+
+    def test_metrics_off(self):
+        result = OrganizerEngine().process_files(self.test_dir, ACC_PATTERN)
+
+        self.assertNotIn('metrics', result.to_dict())
+
+if __name__ == '__main__':
+    unittest.main()
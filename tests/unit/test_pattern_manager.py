@@ -1,7 +1,8 @@
 import unittest
 import tkinter as tk
-from src.core.config_manager import ConfigManager
-from src.core.pattern_manager import PatternManager
+import helpers  # noqa: F401 (puts src on sys.path)
+from core.config_manager import ConfigManager
+from core.pattern_manager import PatternManager
 
 class TestPatternManager(unittest.TestCase):
     def setUp(self):
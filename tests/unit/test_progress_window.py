@@ -1,6 +1,8 @@
 import unittest
 import tkinter as tk
-from src.gui.progress_window import ProgressWindow
+import threading
+import helpers  # noqa: F401 (puts src on sys.path)
+from gui.progress_window import ProgressWindow, ProgressRelay
 
 class TestProgressWindow(unittest.TestCase):
     def setUp(self):
@@ -32,6 +34,25 @@ class TestProgressWindow(unittest.TestCase):
         self.assertEqual(self.progress_window.progress_var.get(), 5)
         self.assertEqual(self.progress_window.status_var.get(), "Processing file 5 (5/10)")
         
+    def test_update_estimated_total(self):
+        self.progress_window.update(3, None, "Processing file 3")
+        self.assertEqual(self.progress_window.status_var.get(), "Processing file 3 (3)")
+        self.progress_window.update(12, 20, "Processing file 12")
+        self.assertEqual(float(self.progress_window.progress_bar.cget("maximum")), 20)
+        
+    def test_unknown_total_is_indeterminate(self):
+        window = ProgressWindow(self.root, None)
+        self.assertEqual(str(window.progress_bar.cget("mode")), "indeterminate")
+        window.update(3, None, "Processing file 3")
+        self.assertEqual(str(window.progress_bar.cget("mode")), "indeterminate")
+        self.assertEqual(window.status_var.get(), "Processing file 3 (3)")
+
+        window.update(4, 8, "Done")
+        self.assertEqual(str(window.progress_bar.cget("mode")), "determinate")
+        self.assertEqual(window.progress_var.get(), 4)
+        self.assertEqual(float(window.progress_bar.cget("maximum")), 8)
+        window.window.destroy()
+
     def test_cancel(self):
         self.progress_window.cancel()
         self.assertTrue(self.progress_window.cancel_var.get())
@@ -45,5 +66,36 @@ class TestProgressWindow(unittest.TestCase):
     def test_window_grab_set(self):
         self.assertTrue(self.progress_window.window.grab_set())
 
+class TestProgressRelay(unittest.TestCase):
+    def test_progress_coalesces(self):
+        relay = ProgressRelay()
+        for i in range(1, 101):
+            relay.report(i, 100, f"Processing {i}")
+
+        progress, messages, dropped = relay.drain()
+        self.assertEqual(progress, (100, 100, "Processing 100"))
+        self.assertEqual(relay.drain()[0], None)
+
+    def test_log_ring_buffer(self):
+        relay = ProgressRelay(max_lines=10)
+        for i in range(25):
+            relay.log(f"line {i}")
+
+        progress, messages, dropped = relay.drain()
+        self.assertEqual(messages, [f"line {i}" for i in range(15, 25)])
+        self.assertEqual(dropped, 15)
+
+    def test_report_from_threads(self):
+        relay = ProgressRelay()
+        threads = [threading.Thread(target=lambda: [relay.log("x") for _ in range(100)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        progress, messages, dropped = relay.drain()
+        self.assertEqual(len(messages) + dropped, 400)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
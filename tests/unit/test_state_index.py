@@ -0,0 +1,116 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+
+from helpers import ACC_PATTERN
+from core.engine import OrganizerEngine, OrganizerOptions
+from core.state_index import StateIndex, DIRENTRY_STAT_IS_FREE, index_path_for
+
+class TestStateIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for filename in ["ACC134.23.pdf", "notes.txt", "scan_001.pdf"]:
+            self.write(filename, "test content")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, filename, content):
+        with open(os.path.join(self.test_dir, filename), 'w') as f:
+            f.write(content)
+
+    def organize(self, pattern=ACC_PATTERN):
+        engine = OrganizerEngine(OrganizerOptions(incremental=True))
+        return engine.process_files(self.test_dir, pattern, "ACC")
+
+    def test_repeat_run_skips_unchanged_files(self):
+        first = self.organize()
+        self.assertEqual(first.unchanged, 0)
+        self.assertEqual(first.moved, 1)
+
+        self.write("ACC135.22.pdf", "new")
+        second = self.organize()
+
+        self.assertEqual(second.unchanged, 2)
+        self.assertEqual(second.matched, 1)
+        self.assertEqual(second.moved, 1)
+
+    def test_changed_file(self):
+        self.organize()
+        self.write("notes.txt", "longer content than before")
+
+        # Size and mtime are only compared where the listing provides them
+        self.assertEqual(self.organize().unchanged, 1 if DIRENTRY_STAT_IS_FREE else 2)
+
+    def test_known_files_are_not_stat_ed(self):
+        self.organize()
+        stats = []
+        engine = OrganizerEngine(OrganizerOptions(incremental=True))
+        scan_entries = engine.file_utils.scan_entries
+
+        class Entry:
+            def __init__(self, entry):
+                self.entry = entry
+                self.name = entry.name
+
+            def stat(self):
+                stats.append(self.name)
+                return self.entry.stat()
+
+        engine.file_utils.scan_entries = lambda *args: (
+            (path, Entry(entry)) for path, entry in scan_entries(*args))
+        result = engine.process_files(self.test_dir, ACC_PATTERN, "ACC")
+
+        self.assertEqual(result.unchanged, 2)
+        self.assertEqual(len(stats), 2 if DIRENTRY_STAT_IS_FREE else 0)
+
+    def test_unchanged_index_is_not_rewritten(self):
+        self.organize()
+        path = index_path_for(self.test_dir)
+        with open(path) as f:
+            signature = json.load(f)['signature']
+
+        index = StateIndex.load(path, signature)
+        self.assertEqual(len(index), 2)
+        for relative_path in list(index.previous):
+            self.assertTrue(index.is_known(relative_path))
+        self.assertFalse(index.save())
+
+        # A file that disappeared changes the index
+        index = StateIndex.load(path, signature)
+        index.is_known("notes.txt")
+        self.assertTrue(index.save())
+
+    def test_pattern_change_discards_index(self):
+        self.organize()
+        pattern = dict(ACC_PATTERN, regex=r"scan_(\d+)()")
+
+        result = self.organize(pattern)
+
+        self.assertEqual(result.unchanged, 0)
+        self.assertEqual(result.moved, 1)
+
+    def test_deleted_files_drop_out(self):
+        self.organize()
+        os.remove(os.path.join(self.test_dir, "notes.txt"))
+        self.organize()
+
+        with open(index_path_for(self.test_dir)) as f:
+            self.assertEqual(sorted(json.load(f)['entries']), ["scan_001.pdf"])
+
+    def test_stale_signature_loads_empty(self):
+        self.organize()
+
+        self.assertEqual(len(StateIndex.load(index_path_for(self.test_dir), "other")), 0)
+
+    def test_corrupt_index_is_ignored(self):
+        os.makedirs(os.path.dirname(index_path_for(self.test_dir)))
+        with open(index_path_for(self.test_dir), 'w') as f:
+            f.write("{not json")
+
+        self.assertEqual(self.organize().moved, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from helpers import ACC_PATTERN
+from core.watcher import FolderWatcher, InotifySource
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, filename):
+        with open(os.path.join(self.test_dir, filename), 'w') as f:
+            f.write("test content")
+
+    def wait_for(self, path, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if os.path.isfile(path):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def check_organizes_new_files(self, use_inotify):
+        self.write("ACC1.23.pdf")
+        watcher = FolderWatcher([self.test_dir], {"ACC": ACC_PATTERN}, debounce=0.1,
+                                use_inotify=use_inotify, poll_interval=0.1)
+        watcher.start()
+        mode = watcher.mode
+        try:
+            self.write("ACC2.22.pdf")
+            self.write("notes.txt")
+            self.assertTrue(self.wait_for(
+                os.path.join(self.test_dir, "ACC", "2023", "ACC1.2023", "ACC1.23.pdf")))
+            self.assertTrue(self.wait_for(
+                os.path.join(self.test_dir, "ACC", "2022", "ACC2.2022", "ACC2.22.pdf")))
+        finally:
+            watcher.stop()
+
+        summary = watcher.summary()[0]
+        self.assertEqual(summary['moved'], 2)
+        self.assertTrue(os.path.isfile(os.path.join(self.test_dir, "notes.txt")))
+        return mode
+
+    def test_polling(self):
+        self.assertEqual(self.check_organizes_new_files(use_inotify=False), "polling")
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux only")
+    def test_inotify(self):
+        try:
+            InotifySource([self.test_dir]).close()
+        except OSError as e:
+            self.skipTest(f"inotify unavailable: {e}")
+        self.assertEqual(self.check_organizes_new_files(use_inotify=True), "inotify")
+
+    def test_debounce_waits_for_file_to_settle(self):
+        watcher = FolderWatcher([self.test_dir], {"ACC": ACC_PATTERN}, debounce=0.2)
+        self.write("ACC1.23.pdf")
+        watcher.seen(self.test_dir, "ACC1.23.pdf")
+        watcher.seen(self.test_dir, "notes.txt")
+
+        self.assertEqual(list(watcher.settled()), [])
+        self.assertEqual(len(watcher.pending), 1)
+        time.sleep(0.25)
+        ready = list(watcher.settled())
+        self.assertEqual([item[1] for item in ready], ["ACC1.23.pdf"])
+        self.assertEqual(watcher.pending, {})
+
+    def test_new_event_restarts_quiet_period(self):
+        watcher = FolderWatcher([self.test_dir], {"ACC": ACC_PATTERN}, debounce=0.2)
+        self.write("ACC1.23.pdf")
+        watcher.seen(self.test_dir, "ACC1.23.pdf")
+        self.assertEqual(list(watcher.settled()), [])
+        time.sleep(0.15)
+        watcher.seen(self.test_dir, "ACC1.23.pdf")
+        time.sleep(0.1)
+
+        self.assertEqual(list(watcher.settled()), [])
+        time.sleep(0.15)
+        self.assertEqual(len(list(watcher.settled())), 1)
+
+    def test_queued_file_is_not_queued_again(self):
+        watcher = FolderWatcher([self.test_dir], {"ACC": ACC_PATTERN}, debounce=0)
+        self.write("ACC1.23.pdf")
+        watcher.seen(self.test_dir, "ACC1.23.pdf")
+        list(watcher.settled())
+        ready = list(watcher.settled())
+        watcher.seen(self.test_dir, "ACC1.23.pdf")
+
+        self.assertEqual(len(ready), 1)
+        self.assertEqual(watcher.pending, {})
+        watcher.process(*ready[0])
+        self.assertEqual(watcher.queued, set())
+        self.assertEqual(watcher.results[self.test_dir].moved, 1)
+
+    def test_queue_is_bounded(self):
+        watcher = FolderWatcher([self.test_dir], {"ACC": ACC_PATTERN}, queue_size=3)
+
+        self.assertEqual(watcher.queue.maxsize, 3)
+
+if __name__ == '__main__':
+    unittest.main()